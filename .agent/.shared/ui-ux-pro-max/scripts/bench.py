@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmarks - latency of search(), BM25 and design-system generation
+Usage: python bench.py [--scales 1,10,100] [--repeat 5] [--output bench.json] [--no-design-system]
+       python bench.py --check-startup [--startup-budget-ms 50]   (exit 1 when over budget)
+       python bench.py --check-cache   (exit 1 when a cached result ignores the analyzer settings)
+       python bench.py --check-batch   (exit 1 when batched BM25 scoring differs from one query at a time)
+       python bench.py --check-fanout  (exit 1 when the default concurrent design-system fan-out differs from a sequential run)
+
+Measures, per scale factor of the CSV corpora:
+  search        cold (fit + write artifact), load (read artifact), warm (resident index) and
+                cached (result cache hit) search() latency per domain and per stack, plus
+                the unified search_all() index
+  bm25          BM25.fit, BM25.score and BM25.top_k per corpus, plus BATCH_QUERIES through
+                top_k_batch against a top_k loop
+  design_system end-to-end generate_design_system, with and without persist_design_system,
+                plus a result-cache hit
+  startup       wall time of one-off `search.py` processes (bytecode and data bundle built, warm OS cache)
+                against a time-to-first-result budget; measured once on the real data/
+
+Every scale runs against a temporary copy of data/ (so cold runs never touch the
+real index/ artifacts). Scales above 1 replicate each row N times with the search
+columns reshuffled per replica. The report is JSON for tracking regressions over time.
+"""
+
+import argparse
+import compileall
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import core
+import design_system
+from core import CSV_CONFIG, STACK_CONFIG, _STACK_COLS, BM25
+
+# ============ CONFIGURATION ============
+DEFAULT_SCALES = [1, 10]
+DEFAULT_REPEAT = 5
+MAX_COLD_REPEAT = 3  # Cold runs rebuild every index; keep them bounded at large scales
+DS_QUERIES = ["saas dashboard", "beauty spa wellness service", "fintech crypto"]
+QUERIES = {
+    "style": "glassmorphism dark mode",
+    "prompt": "minimalism css variables",
+    "color": "healthcare calm palette",
+    "chart": "trend comparison over time",
+    "landing": "hero pricing testimonial",
+    "product": "saas dashboard analytics",
+    "ux": "animation accessibility",
+    "typography": "elegant luxury serif",
+    "icons": "navigation arrow",
+    "react": "rerender memo bundle",
+    "web": "focus outline keyboard",
+}
+STACK_QUERY = "layout responsive form state"
+BATCH_QUERIES = list(QUERIES.values()) + [STACK_QUERY] + DS_QUERIES
+STARTUP_BUDGET_MS = 50  # Time to first result of a one-off search, on top of bare interpreter start
+STARTUP_COMMANDS = {
+    "domain": ["glassmorphism dark mode", "--domain", "style"],
+    "stack": [STACK_QUERY, "--stack", "react"],
+    "all": ["glassmorphism dark mode", "--all"],
+}
+CACHE_CHECK_COMMAND = ["buttons", "--domain", "ux"]  # Ranks differently with UIPRO_STEM=1
+FANOUT_CHECK_CPUS = 4  # CPU count the default fan-out pool is sized for in --check-fanout
+
+
+# ============ HELPERS ============
+def _stats(samples: list) -> dict:
+    """Summary of timing samples in milliseconds."""
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "runs": len(ms),
+        "min_ms": round(ms[0], 4),
+        "median_ms": round(statistics.median(ms), 4),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 4),
+    }
+
+
+def _timed(fn, repeat: int, setup=None) -> dict:
+    """Time fn() `repeat` times; setup() runs untimed before each call."""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return _stats(samples)
+
+
+@contextmanager
+def use_data_dir(path: Path):
+    """Point core and design_system at another data directory for the duration."""
+    saved = (core.DATA_DIR, design_system.DATA_DIR)
+    core.DATA_DIR = design_system.DATA_DIR = Path(path)
+    core.INDEXES.clear()
+    core.RESULTS.clear()
+    try:
+        yield
+    finally:
+        core.DATA_DIR, design_system.DATA_DIR = saved
+        core.INDEXES.clear()
+        core.RESULTS.clear()
+
+
+def _targets() -> list:
+    """(kind, name, file, search_cols, query) for every domain and stack."""
+    targets = [("domain", name, cfg["file"], cfg["search_cols"], QUERIES.get(name, name)) for name, cfg in CSV_CONFIG.items()]
+    targets += [("stack", name, cfg["file"], _STACK_COLS["search_cols"], STACK_QUERY) for name, cfg in STACK_CONFIG.items()]
+    return targets
+
+
+# ============ SYNTHETIC CORPUS ============
+def make_synthetic_data(scale: int, dst: Path, src: Path = None, seed: int = 42) -> Path:
+    """
+    Write a copy of every CSV under src (default: data/) into dst with each row
+    replicated `scale` times. Replicas shuffle the words of the searchable columns
+    and tag them with a replica token, so postings and IDF grow realistically
+    instead of the corpus being exact duplicates.
+    """
+    src = Path(src or core.DATA_DIR)
+    rng = random.Random(seed)
+    search_cols = {cfg["file"]: set(cfg["search_cols"]) for cfg in CSV_CONFIG.values()}
+    search_cols.update({cfg["file"]: set(_STACK_COLS["search_cols"]) for cfg in STACK_CONFIG.values()})
+
+    for csv_path in sorted(src.rglob("*.csv")):
+        rel = csv_path.relative_to(src).as_posix()
+        out_path = dst / rel
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames or []
+            rows = list(reader)
+
+        with open(out_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            for replica in range(scale):
+                for row in rows:
+                    if replica == 0:
+                        writer.writerow(row)
+                        continue
+                    synthetic = dict(row)
+                    for col in search_cols.get(rel, ()):
+                        words = str(synthetic.get(col) or "").split()
+                        rng.shuffle(words)
+                        synthetic[col] = " ".join(words + [f"syn{replica}"])
+                    writer.writerow(synthetic)
+    return dst
+
+
+# ============ BENCHMARKS ============
+def bench_search(repeat: int) -> dict:
+    """Cold / load / warm search() and search_stack() latency per domain and stack."""
+    results = {}
+    for kind, name, filename, _, query in _targets():
+        filepath = core.DATA_DIR / filename
+        if not filepath.exists():
+            continue
+        run = (lambda: core.search_stack(query, name)) if kind == "stack" else (lambda: core.search(query, name))
+
+        def drop_everything():
+            core.INDEXES.discard(str(filepath))
+            core.RESULTS.clear()
+            try:
+                core._index_path(filepath).unlink()
+            except OSError:
+                pass
+
+        def drop_resident():
+            core.INDEXES.discard(str(filepath))
+            core.RESULTS.clear()
+
+        results[f"{kind}:{name}"] = {
+            "query": query,
+            "cold": _timed(run, min(repeat, MAX_COLD_REPEAT), drop_everything),
+            "load": _timed(run, repeat, drop_resident),
+            "warm": _timed(run, repeat, core.RESULTS.clear),
+            "cached": _timed(run, repeat),
+        }
+
+    # Unified cross-domain index (search_all)
+    unified_query = QUERIES["style"]
+
+    def drop_unified():
+        core.INDEXES.clear()
+        try:
+            (core.DATA_DIR.parent / core.INDEX_DIR_NAME / core.UNIFIED_INDEX_FILE).unlink()
+        except OSError:
+            pass
+
+    results["all"] = {
+        "query": unified_query,
+        "cold": _timed(lambda: core.search_all(unified_query), min(repeat, MAX_COLD_REPEAT), drop_unified),
+        "load": _timed(lambda: core.search_all(unified_query), repeat, core.INDEXES.clear),
+        "warm": _timed(lambda: core.search_all(unified_query), repeat),
+    }
+    return results
+
+
+def bench_bm25(repeat: int) -> dict:
+    """BM25.fit / score / top_k per corpus, independent of persistence."""
+    results = {}
+    for kind, name, filename, search_cols, query in _targets():
+        filepath = core.DATA_DIR / filename
+        if not filepath.exists():
+            continue
+        rows = core._load_csv(filepath)
+        documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in rows]
+        bm25 = BM25()
+        bm25.fit(documents)
+        results[f"{kind}:{name}"] = {
+            "documents": len(documents),
+            "vocabulary": len(bm25.idf),
+            "fit": _timed(lambda: BM25().fit(documents), min(repeat, MAX_COLD_REPEAT)),
+            "score": _timed(lambda: bm25.score(query), repeat),
+            "top_k": _timed(lambda: bm25.top_k(query, core.MAX_RESULTS), repeat),
+            "top_k_each": _timed(lambda: [bm25.top_k(q, core.MAX_RESULTS) for q in BATCH_QUERIES], repeat),
+            "top_k_batch": _timed(lambda: bm25.top_k_batch(BATCH_QUERIES, core.MAX_RESULTS), repeat),
+        }
+    return results
+
+
+def bench_design_system(repeat: int) -> dict:
+    """End-to-end generate_design_system, plain and with --persist --page."""
+    results = {}
+    out_dir = Path(tempfile.mkdtemp(prefix="uipro-bench-ds-"))
+    try:
+        for query in DS_QUERIES:
+            results[query] = {
+                "generate": _timed(lambda: design_system.generate_design_system(query, "Bench"), repeat,
+                                   core.RESULTS.clear),
+                "generate_cached": _timed(lambda: design_system.generate_design_system(query, "Bench"), repeat),
+                "generate_persist": _timed(
+                    lambda: design_system.generate_design_system(query, "Bench", persist=True,
+                                                                 page="dashboard", output_dir=str(out_dir)),
+                    repeat, core.RESULTS.clear),
+            }
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    return results
+
+
+def _run_process(argv: list):
+    subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+
+def bench_startup(repeat: int, budget_ms: float = STARTUP_BUDGET_MS) -> dict:
+    """
+    One-off `search.py` process latency against the startup budget.
+
+    Byte-compiles the scripts and builds the data bundle first, as an installed
+    tree would have them (with PYTHONDONTWRITEBYTECODE set, every run would
+    otherwise recompile core.py from source), then discards one run per command so
+    the OS cache is warm. The budget applies to the overhead above `python -c pass`
+    (imports, bundle load and the first search), which is the part this code controls.
+    """
+    compileall.compile_dir(str(Path(__file__).parent), maxlevels=0, quiet=1)
+    core.build_bundle()
+    search_py = str(Path(__file__).parent / "search.py")
+    interpreter = [sys.executable, "-c", "pass"]
+    _run_process(interpreter)
+    baseline = _timed(lambda: _run_process(interpreter), repeat)
+    results = {"budget_ms": budget_ms, "interpreter": baseline, "commands": {}}
+    for name, args in STARTUP_COMMANDS.items():
+        argv = [sys.executable, search_py, *args]
+        _run_process(argv)
+        stats = _timed(lambda: _run_process(argv), repeat)
+        overhead = round(stats["median_ms"] - baseline["median_ms"], 4)
+        results["commands"][name] = dict(stats, overhead_ms=overhead, within_budget=overhead <= budget_ms)
+    results["within_budget"] = all(cmd["within_budget"] for cmd in results["commands"].values())
+    return results
+
+
+def _search_results(args: list, **env) -> list:
+    """Results of one `search.py --json` process run with the given environment overrides."""
+    argv = [sys.executable, str(Path(__file__).parent / "search.py"), *args, "--json"]
+    env = {**os.environ, "UIPRO_STEM": "", "UIPRO_NGRAMS": "1", "UIPRO_CACHE_DIR": "", **env}
+    out = subprocess.run(argv, capture_output=True, text=True, check=True, env=env).stdout
+    return json.loads(out)["results"]
+
+
+def check_cache_settings() -> dict:
+    """
+    Disk-cached results must follow the analyzer settings. Runs CACHE_CHECK_COMMAND
+    with a fresh on-disk result cache, first plain and then with UIPRO_STEM=1, and
+    compares each cached run against an uncached one under the same setting.
+    """
+    cache_dir = tempfile.mkdtemp(prefix="uipro-cache-check-")
+    results = {"command": CACHE_CHECK_COMMAND, "settings": {}}
+    try:
+        for stem in ("", "1"):
+            expected = _search_results(CACHE_CHECK_COMMAND, UIPRO_STEM=stem, UIPRO_CACHE_SIZE="0")
+            cached = _search_results(CACHE_CHECK_COMMAND, UIPRO_STEM=stem, UIPRO_CACHE_DIR=cache_dir)
+            results["settings"][f"UIPRO_STEM={stem}"] = {"expected": expected, "cached": cached,
+                                                         "match": cached == expected}
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    results["ok"] = all(entry["match"] for entry in results["settings"].values())
+    return results
+
+
+def check_batch_scoring() -> dict:
+    """
+    Batched BM25 scoring must rank exactly like one query at a time. For every
+    domain and stack corpus, compares top_k_batch() and score_batch() with per-query
+    top_k() and score() on the NumPy backend (the configured one without NumPy),
+    using BATCH_QUERIES plus every row's own text as queries. Runs once with
+    BATCH_CELLS as configured and once with 3-query chunks to cover chunk boundaries.
+    """
+    backend = "numpy" if core._load_numpy() is not None else core.BM25_BACKEND
+    results = {"backend": backend, "corpora": {}}
+    saved = core.BATCH_CELLS
+    try:
+        for kind, name, filename, search_cols, _ in _targets():
+            filepath = core.DATA_DIR / filename
+            if not filepath.exists():
+                continue
+            rows = core._load_csv(filepath)
+            documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in rows]
+            bm25 = BM25(backend=backend)
+            bm25.fit(documents)
+            queries = BATCH_QUERIES + ["", "zzzz no match"] + documents
+            expected_top_k = [bm25.top_k(q, core.MAX_RESULTS) for q in queries]
+            expected_score = [bm25.score(q) for q in queries]
+            checks = {}
+            for cells in (saved, 3 * bm25.N):
+                core.BATCH_CELLS = cells
+                checks[str(cells)] = (bm25.top_k_batch(queries, core.MAX_RESULTS) == expected_top_k
+                                      and bm25.score_batch(queries) == expected_score)
+            results["corpora"][f"{kind}:{name}"] = {"queries": len(queries), "batch_cells": checks,
+                                                    "match": all(checks.values())}
+    finally:
+        core.BATCH_CELLS = saved
+    results["ok"] = all(entry["match"] for entry in results["corpora"].values())
+    return results
+
+
+def check_fanout() -> dict:
+    """
+    The default design-system fan-out must produce exactly what a sequential run does.
+    Generates every DS_QUERIES design system, plain and with --persist --page (which
+    prefetches the page searches), with the default worker count, with a process pool
+    and inline. os.cpu_count() reports FANOUT_CHECK_CPUS, so the default path runs a
+    real pool even on a single-CPU host; the pool sizes it created are recorded.
+    """
+    out_dir = tempfile.mkdtemp(prefix="uipro-fanout-check-")
+    make_pool = design_system._make_pool
+    pools = []
+
+    def recording_pool(max_workers, executor, tasks):
+        pool = make_pool(max_workers, executor, tasks)
+        pools.append(None if pool is None else pool._max_workers)
+        return pool
+
+    def generate(query, **kwargs):
+        core.RESULTS.clear()
+        return (design_system.generate_design_system(query, "Check", **kwargs),
+                design_system.generate_design_system(query, "Check", persist=True, page="dashboard",
+                                                     output_dir=out_dir, **kwargs))
+
+    results = {"cpus": FANOUT_CHECK_CPUS, "queries": {}}
+    try:
+        with mock.patch.object(design_system.os, "cpu_count", return_value=FANOUT_CHECK_CPUS), \
+                mock.patch.object(design_system, "_make_pool", recording_pool):
+            for query in DS_QUERIES:
+                expected = generate(query, max_workers=1)
+                pools.clear()
+                default = generate(query)
+                default_pools = list(pools)
+                process = generate(query, executor="process")
+                results["queries"][query] = {"default_pools": default_pools, "default": default == expected,
+                                             "process": process == expected}
+    finally:
+        core.RESULTS.clear()
+        shutil.rmtree(out_dir, ignore_errors=True)
+    results["ok"] = all(entry["default"] and entry["process"] and all(entry["default_pools"])
+                        for entry in results["queries"].values())
+    return results
+
+
+def run_benchmarks(scales: list, repeat: int, include_design_system: bool = True) -> dict:
+    """Run every benchmark at every scale and return the JSON-ready report."""
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "bm25_backend": core.BM25_BACKEND,
+        "repeat": repeat,
+        "scales": {},
+    }
+    for scale in scales:
+        # Always work on a copy so cold runs never delete the real index artifacts
+        tmp = Path(tempfile.mkdtemp(prefix="uipro-bench-"))
+        if scale == 1:
+            data_dir = shutil.copytree(core.DATA_DIR, tmp / "data")
+        else:
+            data_dir = make_synthetic_data(scale, tmp / "data")
+        try:
+            with use_data_dir(data_dir):
+                entry = {"search": bench_search(repeat), "bm25": bench_bm25(repeat)}
+                if include_design_system:
+                    entry["design_system"] = bench_design_system(repeat)
+            report["scales"][str(scale)] = entry
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    report["startup"] = bench_startup(repeat)
+    return report
+
+
+# ============ CLI ============
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max search benchmarks")
+    parser.add_argument("--scales", type=str, default=",".join(map(str, DEFAULT_SCALES)),
+                        help="Comma-separated corpus scale factors, e.g. 1,10,100,1000 (default: 1,10)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per measurement (default: 5)")
+    parser.add_argument("--no-design-system", action="store_true", help="Skip generate_design_system benchmarks")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Write the JSON report to a file instead of stdout")
+    parser.add_argument("--check-startup", action="store_true",
+                        help="Only measure one-off search.py startup; exit 1 when over the budget")
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help=f"Startup budget above bare interpreter start (default: {STARTUP_BUDGET_MS})")
+    parser.add_argument("--check-cache", action="store_true",
+                        help="Only check that disk-cached results follow UIPRO_STEM; exit 1 on a stale result")
+    parser.add_argument("--check-batch", action="store_true",
+                        help="Only check that batched BM25 scoring matches per-query scoring; exit 1 on a mismatch")
+    parser.add_argument("--check-fanout", action="store_true",
+                        help="Only check that the default concurrent design-system fan-out matches a sequential run")
+
+    args = parser.parse_args()
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+
+    if args.check_startup:
+        startup = bench_startup(max(1, args.repeat), args.startup_budget_ms)
+        print(json.dumps(startup, indent=2))
+        raise SystemExit(0 if startup["within_budget"] else 1)
+    if args.check_cache:
+        check = check_cache_settings()
+        print(json.dumps(check, indent=2, ensure_ascii=False))
+        raise SystemExit(0 if check["ok"] else 1)
+    if args.check_batch:
+        check = check_batch_scoring()
+        print(json.dumps(check, indent=2))
+        raise SystemExit(0 if check["ok"] else 1)
+    if args.check_fanout:
+        check = check_fanout()
+        print(json.dumps(check, indent=2))
+        raise SystemExit(0 if check["ok"] else 1)
+
+    report = run_benchmarks(scales, max(1, args.repeat), not args.no_design_system)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        print(f"Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
@@ -4,15 +4,42 @@
 UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
-import csv
+import _thread  # Plain locks; threading itself is imported only to start the index watcher (CLI startup)
+import functools
+import heapq
+import io
+import marshal
+import os
 import re
+import sys
+import time
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping, Sequence
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
+INDEX_DIR_NAME = "index"  # Prebuilt BM25 artifacts live next to data/
+INDEX_VERSION = 1
 MAX_RESULTS = 3
+# "python" (default) or "numpy"; numpy falls back to python when NumPy is not installed
+BM25_BACKEND = os.environ.get("UIPRO_BM25_BACKEND", "python")
+BATCH_CELLS = 1 << 16  # Max query x document cells scored per NumPy batch chunk (512 KB: stays in cache)
+POLL_INTERVAL = 2.0  # Seconds between CSV change checks when an IndexManager is watching
+COMPACT_EVERY = 16  # Incremental appends to one index before it is refitted and persisted
+CACHE_SIZE = int(os.environ.get("UIPRO_CACHE_SIZE", "512"))  # In-process result cache entries (0 disables)
+CACHE_TTL = float(os.environ.get("UIPRO_CACHE_TTL", "3600"))  # Seconds a cached result stays valid
+CACHE_DIR = os.environ.get("UIPRO_CACHE_DIR") or None  # Optional on-disk result cache tier
+STEM = os.environ.get("UIPRO_STEM", "") == "1"  # Light (plural) stemming in the BM25 analyzer
+NGRAMS = int(os.environ.get("UIPRO_NGRAMS", "1"))  # Also index word n-grams up to this length (1 = words only)
+QUERY_CACHE_SIZE = 1024  # Tokenized query strings memoized per analyzer
+SEARCH_MODES = ("bm25", "vector", "hybrid")
+VECTOR_DIMS = 256  # Hashing-vectorizer dimensions per document vector
+LSH_TABLES = 8  # Random-projection hash tables probed per vector query
+LSH_BUCKET_SIZE = 4  # Target documents per LSH bucket (sets the hyperplanes per table)
+HYBRID_DEPTH = 4  # Hybrid mode fuses the top max_results * HYBRID_DEPTH of each ranking
+RRF_K = 60  # Reciprocal rank fusion constant
 
 CSV_CONFIG = {
     "style": {
@@ -96,28 +123,158 @@ _STACK_COLS = {
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 
+# ============ OPTIONAL NUMPY ============
+_numpy = None
+
+
+def _load_numpy():
+    """Import NumPy on first use (keeps CLI startup cheap). Returns None if not installed"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+# ============ ANALYZERS ============
+ORIGINAL_ANALYZER = {"min_length": 3, "stem": False, "ngrams": 1}  # Indexes persisted without an analyzer config
+
+
+class Analyzer:
+    """
+    Text -> tokens pipeline shared by indexing and querying: lowercase, take runs
+    of at least min_length word characters with one precompiled regex, then
+    optional light stemming and word n-grams. The defaults give exactly the
+    original BM25 tokens. query() memoizes tokenized query strings.
+    """
+
+    _shared = {}
+    _shared_lock = _thread.allocate_lock()
+
+    def __init__(self, min_length=3, stem=False, ngrams=1, cache_size=QUERY_CACHE_SIZE):
+        self.min_length = min_length
+        self.stem = stem
+        self.ngrams = ngrams
+        self._words = re.compile(r"\w{%d,}" % max(min_length, 1))
+        self._stems = _StemCache(self._stem)
+        self.query = functools.lru_cache(maxsize=cache_size)(self._query)
+
+    @classmethod
+    def shared(cls, config=None):
+        """Process-wide analyzer for a config() dict (None = configured STEM/NGRAMS), sharing one query cache"""
+        config = config or {"min_length": 3, "stem": STEM, "ngrams": NGRAMS}
+        key = tuple(sorted(config.items()))
+        analyzer = cls._shared.get(key)
+        if analyzer is None:
+            with cls._shared_lock:
+                analyzer = cls._shared.setdefault(key, cls(**config))
+        return analyzer
+
+    def config(self):
+        """Settings that determine the tokens; persisted with every index built by this analyzer"""
+        return {"min_length": self.min_length, "stem": self.stem, "ngrams": self.ngrams}
+
+    def __reduce__(self):
+        return Analyzer.shared, (self.config(),)
+
+    @classmethod
+    def current(cls, config):
+        """True if tokens produced with config match the configured analyzer (else the index is rebuilt)"""
+        return config == cls.shared().config()
+
+    def __call__(self, text):
+        """Tokens of one document or query"""
+        tokens = self._words.findall(str(text).lower())
+        if self.stem:
+            stems = self._stems
+            tokens = [stems[w] for w in tokens]
+        if self.ngrams > 1:
+            words = tokens
+            tokens = words + [" ".join(words[i:i + n]) for n in range(2, self.ngrams + 1)
+                              for i in range(len(words) - n + 1)]
+        return tokens
+
+    def _query(self, text):
+        return tuple(self(text))
+
+    @staticmethod
+    def _stem(word):
+        """Harman S-stemmer: plural suffixes -ies, -es, -s only (-es dropped after sibilants)"""
+        stem = word
+        if word.endswith("ies") and not word.endswith(("eies", "aies")):
+            stem = word[:-3] + "y"
+        elif word.endswith(("sses", "shes", "ches", "xes", "zes")):
+            stem = word[:-2]
+        elif word.endswith("es") and not word.endswith(("aes", "ees", "oes")):
+            stem = word[:-1]
+        elif word.endswith("s") and not word.endswith(("us", "ss")):
+            stem = word[:-1]
+        return stem
+
+
+class _StemCache(dict):
+    """word -> stem memo; misses are stemmed once and stored"""
+
+    def __init__(self, stem):
+        super().__init__()
+        self._stem_word = stem
+
+    def __missing__(self, word):
+        stem = self[word] = self._stem_word(word)
+        return stem
+
+
 # ============ BM25 IMPLEMENTATION ============
 class BM25:
     """BM25 ranking algorithm for text search"""
 
-    def __init__(self, k1=1.5, b=0.75):
+    def __init__(self, k1=1.5, b=0.75, backend=None, analyzer=None):
         self.k1 = k1
         self.b = b
+        self.backend = backend or BM25_BACKEND
+        self.analyzer = analyzer or Analyzer.shared()
         self.corpus = []
         self.doc_lengths = []
         self.avgdl = 0
         self.idf = {}
         self.doc_freqs = defaultdict(int)
+        self.postings = {}
         self.N = 0
+        self._reset_caches()
+
+    def __getstate__(self):
+        """Pickle the fitted state with its norms and MaxScore bounds; per-term and NumPy caches are rebuilt lazily"""
+        state = dict(self.__dict__)
+        state.update(_tf_maps={}, _csr=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "analyzer" not in state:  # Pickled before analyzers were configurable
+            self.analyzer = Analyzer.shared(ORIGINAL_ANALYZER)
+
+    def _reset_caches(self):
+        """Drop values derived from the fitted state (norms, MaxScore bounds, tf lookups)"""
+        self._norms = None
+        self._upper_bounds = None
+        self._tf_maps = {}
+        self._csr = None
 
     def tokenize(self, text):
-        """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        """Lowercase, split, remove punctuation, filter short words (see Analyzer)"""
+        return self.analyzer(text)
 
     def fit(self, documents):
         """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
+        self.fit_tokenized([self.tokenize(doc) for doc in documents])
+
+    def fit_tokenized(self, corpus):
+        """Build BM25 index from already-tokenized documents (e.g. merged from other indexes)"""
+        self._reset_caches()
+        self.corpus = corpus
         self.N = len(self.corpus)
         if self.N == 0:
             return
@@ -134,125 +291,2160 @@ class BM25:
         for word, freq in self.doc_freqs.items():
             self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
-
+        # Postings: term -> [[doc_id, tf], ...] in ascending doc_id order
         for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
             term_freqs = defaultdict(int)
             for word in doc:
                 term_freqs[word] += 1
+            for word, tf in term_freqs.items():
+                self.postings.setdefault(word, []).append([idx, tf])
+
+    def add_documents(self, documents):
+        """Append documents without refitting the existing corpus"""
+        self.add_tokenized([self.tokenize(doc) for doc in documents])
+
+    def add_tokenized(self, corpus):
+        """
+        Append already-tokenized documents: doc freqs and postings are updated for the
+        new documents only, IDF and avgdl are recomputed from the counts. Scores match a
+        full fit over the combined corpus. Postings lists are replaced, never extended,
+        so an index copied with copy() beforehand is left untouched.
+        """
+        if not corpus:
+            return
+        self._reset_caches()
+        new_postings = defaultdict(list)
+        for idx, doc in enumerate(corpus, self.N):
+            term_freqs = defaultdict(int)
+            for word in doc:
+                term_freqs[word] += 1
+            for word, tf in term_freqs.items():
+                self.doc_freqs[word] += 1
+                new_postings[word].append([idx, tf])
+        for word, postings in new_postings.items():
+            self.postings[word] = self.postings.get(word, []) + postings
+
+        self.corpus.extend(corpus)
+        self.doc_lengths.extend(len(doc) for doc in corpus)
+        self.N = len(self.corpus)
+        self.avgdl = sum(self.doc_lengths) / self.N
+        self.idf = {word: log((self.N - freq + 0.5) / (freq + 0.5) + 1) for word, freq in self.doc_freqs.items()}
+
+    def copy(self):
+        """Copy sharing postings lists, safe to add_tokenized() to while this index serves readers"""
+        clone = BM25(self.k1, self.b, self.backend, self.analyzer)
+        clone.corpus = list(self.corpus)
+        clone.doc_lengths = list(self.doc_lengths)
+        clone.avgdl = self.avgdl
+        clone.idf = dict(self.idf)
+        clone.doc_freqs = defaultdict(int, self.doc_freqs)
+        clone.postings = dict(self.postings)
+        clone.N = self.N
+        return clone
+
+    def to_dict(self):
+        """Export fitted state as a JSON-serializable dict"""
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "corpus": self.corpus,
+            "doc_lengths": self.doc_lengths,
+            "avgdl": self.avgdl,
+            "idf": self.idf,
+            "doc_freqs": dict(self.doc_freqs),
+            "postings": self.postings,
+            "N": self.N,
+            "analyzer": self.analyzer.config()
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Restore a fitted BM25 from to_dict() output without re-fitting"""
+        bm25 = cls(state["k1"], state["b"], analyzer=Analyzer.shared(state.get("analyzer", ORIGINAL_ANALYZER)))
+        bm25.corpus = state["corpus"]
+        bm25.doc_lengths = state["doc_lengths"]
+        bm25.avgdl = state["avgdl"]
+        bm25.idf = state["idf"]
+        bm25.doc_freqs = defaultdict(int, state["doc_freqs"])
+        bm25.postings = state["postings"]
+        bm25.N = state["N"]
+        return bm25
+
+    def to_arrays(self):
+        """
+        Export fitted state as (header, typed arrays) for a memory-mapped index file:
+        terms sorted by UTF-8 bytes with their IDF and MaxScore bounds, term-major
+        postings, per-document lengths and norms, and the corpus as term ids.
+        """
+        import array  # Build-time only, like csv; keeps CLI startup cheap
+
+        terms = sorted(self.postings, key=lambda t: t.encode('utf-8'))
+        term_ids = {term: i for i, term in enumerate(terms)}
+        bounds = self._term_upper_bounds()
+        term_blob, term_offsets = bytearray(), array.array('I', [0])
+        post_offsets, post_docs, post_tfs = array.array('I', [0]), array.array('I'), array.array('I')
+        for term in terms:
+            term_blob += term.encode('utf-8')
+            term_offsets.append(len(term_blob))
+            for idx, tf in self.postings[term]:
+                post_docs.append(idx)
+                post_tfs.append(tf)
+            post_offsets.append(len(post_docs))
+        doc_offsets, doc_terms = array.array('I', [0]), array.array('I')
+        for doc in self.corpus:
+            doc_terms.extend(term_ids[word] for word in doc)
+            doc_offsets.append(len(doc_terms))
+
+        header = {"k1": self.k1, "b": self.b, "N": self.N, "avgdl": self.avgdl, "analyzer": self.analyzer.config()}
+        return header, {
+            "term_offsets": term_offsets,
+            "terms": array.array('B', term_blob),
+            "idf": array.array('d', (self.idf[term] for term in terms)),
+            "bounds": array.array('d', (bounds[term] for term in terms)),
+            "post_offsets": post_offsets,
+            "post_docs": post_docs,
+            "post_tfs": post_tfs,
+            "doc_lengths": array.array('I', self.doc_lengths),
+            "norms": array.array('d', self._length_norms() if self.N else []),
+            "doc_offsets": doc_offsets,
+            "doc_terms": doc_terms
+        }
+
+    @classmethod
+    def from_arrays(cls, state, arrays):
+        """
+        BM25 reading to_arrays() output in place (e.g. memoryviews from _map_arrays):
+        postings, IDF and the corpus are decoded per term or document on access, so
+        opening the index copies nothing. Scores match the exported index exactly.
+        """
+        bm25 = cls(state["k1"], state["b"], analyzer=Analyzer.shared(state.get("analyzer", ORIGINAL_ANALYZER)))
+        terms = _Terms(arrays["term_offsets"], arrays["terms"])
+        idf, bounds = arrays["idf"], arrays["bounds"]
+        post_offsets, post_docs, post_tfs = arrays["post_offsets"], arrays["post_docs"], arrays["post_tfs"]
+        doc_offsets, doc_terms = arrays["doc_offsets"], arrays["doc_terms"]
+
+        def postings(tid):
+            start, end = post_offsets[tid], post_offsets[tid + 1]
+            return list(zip(post_docs[start:end], post_tfs[start:end]))
+
+        bm25.postings = _TermTable(terms, postings)
+        bm25.idf = _TermTable(terms, idf.__getitem__)
+        bm25.doc_freqs = _TermTable(terms, lambda tid: post_offsets[tid + 1] - post_offsets[tid])
+        bm25.corpus = _LazySequence(len(doc_offsets) - 1, lambda idx: [
+            terms.term(tid) for tid in doc_terms[doc_offsets[idx]:doc_offsets[idx + 1]]])
+        bm25.doc_lengths = arrays["doc_lengths"]
+        bm25.avgdl = state["avgdl"]
+        bm25.N = state["N"]
+        bm25._norms = arrays["norms"]
+        bm25._upper_bounds = _TermTable(terms, bounds.__getitem__)
+        return bm25
+
+    def _length_norms(self):
+        """Per-document k1 * (1 - b + b * dl / avgdl), computed once per fitted index"""
+        if self._norms is None:
+            self._norms = [self.k1 * (1 - self.b + self.b * dl / self.avgdl) for dl in self.doc_lengths]
+        return self._norms
+
+    def _term_upper_bounds(self):
+        """MaxScore bounds: the largest contribution each term makes to any single document"""
+        if self._upper_bounds is None:
+            norms = self._length_norms() if self.N else []
+            k1_plus_1 = self.k1 + 1
+            self._upper_bounds = {
+                word: max(self.idf[word] * (tf * k1_plus_1) / (tf + norms[idx]) for idx, tf in postings)
+                for word, postings in self.postings.items()
+            }
+        return self._upper_bounds
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+    def _tf_map(self, word):
+        """doc_id -> tf lookup for one term, built lazily from its postings"""
+        tf_map = self._tf_maps.get(word)
+        if tf_map is None:
+            tf_map = self._tf_maps[word] = dict(self.postings.get(word, ()))
+        return tf_map
 
-            scores.append((idx, score))
+    def _accumulate(self, query_tokens):
+        """Term-at-a-time accumulation over postings. Returns {doc_id: score}"""
+        norms = self._length_norms() if self.N else []
+        k1_plus_1 = self.k1 + 1
+        acc = {}
 
+        for token in query_tokens:
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = self.idf[token]
+            for idx, tf in postings:
+                acc[idx] = acc.get(idx, 0) + idf * (tf * k1_plus_1) / (tf + norms[idx])
+
+        return acc
+
+    def score_sparse(self, query):
+        """Score only documents containing a query term via postings. Returns {doc_id: score}"""
+        return self._accumulate(self.analyzer.query(query))
+
+    def score(self, query):
+        """Score all documents against query"""
+        np = self._np()
+        if np is not None:
+            return self._rank_array(np, self._score_array(np, self.analyzer.query(query)))
+
+        acc = self.score_sparse(query)
+        scores = [(idx, acc.get(idx, 0)) for idx in range(self.N)]
         return sorted(scores, key=lambda x: x[1], reverse=True)
 
+    def top_k(self, query, k, prune=True, allowed=None):
+        """
+        Return the k best (doc_id, score) pairs with score > 0, in the same order
+        as score(query)[:k], using a bounded heap instead of a full sort.
+
+        With prune=True, terms are processed by descending MaxScore upper bound.
+        Once the bounds of the remaining terms sum to less than the current k-th
+        best partial score, documents not seen yet cannot enter the top k, so the
+        remaining terms only update existing candidates.
+
+        allowed: optional per-document sequence of bools; other documents are skipped.
+        """
+        with profile_stage("tokenize"):
+            query_tokens = self.analyzer.query(query)
+        if k <= 0 or not any(token in self.postings for token in query_tokens):
+            return []
+
+        np = self._np()
+        if np is not None:
+            with profile_stage("score"):
+                scores = self._score_array(np, query_tokens)
+                if allowed is not None:
+                    scores[~np.asarray(allowed, dtype=bool)] = 0
+            with profile_stage("top_k"):
+                return self._rank_array(np, scores, k)
+
+        with profile_stage("score"):
+            if not prune:
+                acc = self._accumulate(query_tokens)
+                if allowed is not None:
+                    acc = {idx: score for idx, score in acc.items() if allowed[idx]}
+            else:
+                acc = self._maxscore_candidates(query_tokens, k, allowed)
+                # Rescore the survivors in query-token order so floats match score() exactly
+                norms = self._length_norms()
+                k1_plus_1 = self.k1 + 1
+                for idx in acc:
+                    total = 0
+                    for token in query_tokens:
+                        tf = self._tf_map(token).get(idx)
+                        if tf:
+                            total += self.idf[token] * (tf * k1_plus_1) / (tf + norms[idx])
+                    acc[idx] = total
+
+        with profile_stage("top_k"):
+            best = heapq.nlargest(k, acc.items(), key=lambda x: (x[1], -x[0]))
+            return [(idx, score) for idx, score in best if score > 0]
+
+    def explain(self, query, idx):
+        """
+        Score breakdown of document idx: tf, idf and length norm per query token and
+        its contribution idf * tf * (k1 + 1) / (tf + norm); "bm25" is their sum, as in top_k()
+        """
+        norm = self._length_norms()[idx]
+        k1_plus_1 = self.k1 + 1
+        total, terms = 0, []
+        for token in self.analyzer.query(query):
+            tf = self._tf_map(token).get(idx, 0)
+            idf = self.idf.get(token, 0.0)
+            contribution = idf * (tf * k1_plus_1) / (tf + norm) if tf else 0.0
+            total += contribution
+            terms.append({"term": token, "tf": tf, "idf": idf, "length_norm": norm, "score": contribution})
+        return {"doc": idx, "doc_length": self.doc_lengths[idx], "bm25": total, "terms": terms}
+
+    def _maxscore_candidates(self, query_tokens, k, allowed=None):
+        """Partial scores for every document that can still reach the top k"""
+        bounds = self._term_upper_bounds()
+        terms = sorted((t for t in query_tokens if t in self.postings), key=lambda t: bounds[t], reverse=True)
+
+        # remaining[i] = best score a document unseen before terms[i] could still reach
+        remaining = [0.0] * (len(terms) + 1)
+        for i in range(len(terms) - 1, -1, -1):
+            remaining[i] = bounds[terms[i]] + remaining[i + 1]
+
+        norms = self._length_norms()
+        k1_plus_1 = self.k1 + 1
+        acc = {}
+        admitting = True
+
+        for i, token in enumerate(terms):
+            if admitting and len(acc) >= k:
+                threshold = heapq.nlargest(k, acc.values())[-1]
+                # Keep ties (and float rounding) admissible: score() breaks ties by doc id
+                admitting = remaining[i] >= threshold * (1 - 1e-9)
+
+            idf = self.idf[token]
+            if admitting:
+                for idx, tf in self.postings[token]:
+                    if allowed is None or allowed[idx]:
+                        acc[idx] = acc.get(idx, 0) + idf * (tf * k1_plus_1) / (tf + norms[idx])
+            else:
+                tf_map = self._tf_map(token)
+                for idx in acc:
+                    tf = tf_map.get(idx)
+                    if tf:
+                        acc[idx] += idf * (tf * k1_plus_1) / (tf + norms[idx])
+
+        return acc
+
+    # ---- NumPy backend ----
+    def _np(self):
+        """NumPy module when the numpy backend is selected and installed, else None"""
+        return _load_numpy() if self.backend == "numpy" and self.N else None
+
+    def _csr_arrays(self, np):
+        """
+        Term-major CSR view of the postings: (vocab, indptr, doc_ids, weights).
+
+        weights already fold in idf, tf saturation and length normalization, so
+        scoring a term is a gather + add over its slice.
+        """
+        if self._csr is None:
+            vocab = {}
+            indptr = [0]
+            doc_ids = []
+            tfs = []
+            for word, postings in self.postings.items():
+                vocab[word] = len(vocab)
+                doc_ids.extend(idx for idx, _ in postings)
+                tfs.extend(tf for _, tf in postings)
+                indptr.append(len(doc_ids))
+
+            indptr = np.asarray(indptr, dtype=np.int64)
+            doc_ids = np.asarray(doc_ids, dtype=np.int64)
+            tfs = np.asarray(tfs, dtype=np.float64)
+            norms = np.asarray(self._length_norms(), dtype=np.float64)
+            idf = np.repeat(np.asarray([self.idf[w] for w in vocab], dtype=np.float64), np.diff(indptr))
+            weights = idf * (tfs * (self.k1 + 1)) / (tfs + norms[doc_ids])
+            self._csr = (vocab, indptr, doc_ids, weights)
+        return self._csr
+
+    def _score_array(self, np, query_tokens):
+        """Dense score vector for one tokenized query"""
+        vocab, indptr, doc_ids, weights = self._csr_arrays(np)
+        scores = np.zeros(self.N)
+        for token in query_tokens:
+            tid = vocab.get(token)
+            if tid is not None:
+                start, end = indptr[tid], indptr[tid + 1]
+                scores[doc_ids[start:end]] += weights[start:end]
+        return scores
+
+    def _score_matrix(self, np, token_lists):
+        """
+        Dense (queries x documents) scores for a chunk of tokenized queries. Every
+        matched query term's postings slice is gathered into one flat query * N + doc
+        index and summed with a single np.bincount, which adds each cell's weights in
+        query-token order - the same sums, bit for bit, as _score_array().
+        """
+        vocab, indptr, doc_ids, weights = self._csr_arrays(np)
+        q_idx, tids = [], []
+        for qi, tokens in enumerate(token_lists):
+            for token in tokens:
+                tid = vocab.get(token)
+                if tid is not None:
+                    q_idx.append(qi)
+                    tids.append(tid)
+
+        shape = (len(token_lists), self.N)
+        if not tids:
+            return np.zeros(shape)
+        tids = np.asarray(tids, dtype=np.int64)
+        starts = indptr[tids]
+        lengths = indptr[tids + 1] - starts
+        # Position of every gathered posting: its term's start plus its rank within the term
+        positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        cells = np.repeat(np.asarray(q_idx, dtype=np.int64) * self.N, lengths) + doc_ids[positions]
+        return np.bincount(cells, weights=weights[positions], minlength=shape[0] * shape[1]).reshape(shape)
+
+    @staticmethod
+    def _rank_array(np, scores, k=None, hits=None):
+        """score()-style ranking of a score vector; with k, top-k with score > 0 (hits: those doc ids, if known)"""
+        if k is None:
+            order = np.argsort(-scores, kind="stable")
+            return list(zip(order.tolist(), scores[order].tolist()))
+
+        if hits is None:
+            hits = np.flatnonzero(scores > 0)
+        if len(hits) > k:
+            kth = np.partition(scores[hits], len(hits) - k)[len(hits) - k]
+            hits = hits[scores[hits] >= kth]
+        # Descending score, ties by ascending doc id (matches the stable full sort)
+        order = hits[np.lexsort((hits, -scores[hits]))][:k]
+        return list(zip(order.tolist(), scores[order].tolist()))
+
+    def score_batch(self, queries):
+        """score() for many queries, in order; on NumPy, one bincount per chunk of queries"""
+        return self._batch(queries, None)
+
+    def top_k_batch(self, queries, k):
+        """top_k() for many queries, in order; on NumPy, one bincount per chunk of queries"""
+        if k <= 0:
+            return [[] for _ in queries]
+        return self._batch(queries, k)
+
+    def _batch(self, queries, k):
+        np = self._np()
+        if np is None:
+            if k is None:
+                return [self.score(q) for q in queries]
+            return [self.top_k(q, k) for q in queries]
+
+        token_lists = [self.analyzer.query(q) for q in queries]
+        chunk = max(1, BATCH_CELLS // self.N)
+        ranked = []
+        for start in range(0, len(token_lists), chunk):
+            matrix = self._score_matrix(np, token_lists[start:start + chunk])
+            if k is None:
+                ranked.extend(self._rank_array(np, row) for row in matrix)
+                continue
+            # One pass finds every query's hits: row-major cells, so each query's are a sorted run
+            cells = np.flatnonzero(matrix > 0)
+            bounds = np.searchsorted(cells, np.arange(len(matrix) + 1) * self.N).tolist()
+            ranked.extend(self._rank_array(np, row, k, cells[bounds[qi]:bounds[qi + 1]] - qi * self.N)
+                          for qi, row in enumerate(matrix))
+        return ranked
+
+
+# ============ ROW STORE ============
+class RowStore:
+    """
+    Column-oriented rows of one CSV: interned column names, one tuple per column
+    and de-duplicated cell strings. Rows are read through RowView, not per-row dicts.
+    """
+
+    __slots__ = ("columns", "_col_index", "_data", "_projections", "n")
+
+    def __init__(self, columns, table):
+        """columns: header names; table: one list of cell values per row (None = missing cell)"""
+        self.columns = tuple(sys.intern(col) for col in columns)
+        self._col_index = {col: i for i, col in enumerate(self.columns)}
+        self.n = len(table)
+        pool = {}
+        self._data = tuple(
+            tuple(pool.setdefault(row[i], row[i]) if isinstance(row[i], str) else row[i] for row in table)
+            for i in range(len(self.columns))
+        )
+        self._projections = {}
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, idx):
+        return RowView(self, idx, self.columns)
+
+    def __iter__(self):
+        return (RowView(self, idx, self.columns) for idx in range(self.n))
+
+    def value(self, idx, col, default=None):
+        """Cell value, or default when the column does not exist"""
+        ci = self._col_index.get(col)
+        return default if ci is None else self._data[ci][idx]
+
+    def project(self, idx, cols, tag=None):
+        """View of row idx restricted to the existing columns among cols, optionally led by a (key, value) tag"""
+        cols = tuple(cols)
+        projection = self._projections.get(cols)
+        if projection is None:
+            projection = self._projections[cols] = tuple(sys.intern(c) for c in cols if c in self._col_index)
+        return RowView(self, idx, projection, tag)
+
+    def extended(self, table):
+        """New store with rows appended; this one is left untouched for concurrent readers"""
+        store = RowStore.__new__(RowStore)
+        store.columns = self.columns
+        store._col_index = self._col_index
+        store.n = self.n + len(table)
+        store._data = tuple(tuple(col) + tuple(row[i] for row in table) for i, col in enumerate(self._data))
+        store._projections = dict(self._projections)
+        return store
+
+    def table(self):
+        """Row-major list of cell lists (persistence format)"""
+        return [list(row) for row in zip(*self._data)] if self._data else [[] for _ in range(self.n)]
+
+    def to_arrays(self):
+        """Export as (header, typed arrays): column-major UTF-8 cells with offsets and a missing-cell flag each"""
+        import array
+        blob, offsets, missing = bytearray(), array.array('I', [0]), array.array('B')
+        for column in self._data:
+            for cell in column:
+                missing.append(cell is None)
+                if cell is not None:
+                    blob += cell.encode('utf-8')
+                offsets.append(len(blob))
+        header = {"columns": list(self.columns), "n": self.n}
+        return header, {"cell_offsets": offsets, "cell_missing": missing, "cells": array.array('B', blob)}
+
+    @classmethod
+    def from_arrays(cls, state, arrays):
+        """Store reading to_arrays() output in place; each cell is decoded when accessed"""
+        store = cls.__new__(cls)
+        store.columns = tuple(sys.intern(col) for col in state["columns"])
+        store._col_index = {col: i for i, col in enumerate(store.columns)}
+        store.n = n = state["n"]
+        offsets, missing, cells = arrays["cell_offsets"], arrays["cell_missing"], arrays["cells"]
+
+        def column(base):
+            def cell(idx):
+                k = base + idx
+                return None if missing[k] else str(cells[offsets[k]:offsets[k + 1]], 'utf-8')
+            return _LazySequence(n, cell)
+
+        store._data = tuple(column(ci * n) for ci in range(len(store.columns)))
+        store._projections = {}
+        return store
+
+
+class RowView(Mapping):
+    """Read-only dict-like view of one stored row; materialize with to_dict() at output time"""
+
+    __slots__ = ("_store", "_idx", "_cols", "_tag")
+
+    def __init__(self, store, idx, cols, tag=None):
+        self._store = store
+        self._idx = idx
+        self._cols = cols
+        self._tag = tag
+
+    def __getitem__(self, key):
+        if self._tag is not None and key == self._tag[0]:
+            return self._tag[1]
+        if key not in self._cols:
+            raise KeyError(key)
+        return self._store.value(self._idx, key)
+
+    def __iter__(self):
+        if self._tag is not None:
+            yield self._tag[0]
+        yield from self._cols
+
+    def __len__(self):
+        return len(self._cols) + (self._tag is not None)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def __reduce__(self):
+        # Pickle (e.g. process-pool results) as a plain dict, not the whole store
+        return dict, (self.to_dict(),)
+
+
+def json_default(obj):
+    """json.dumps default= hook that materializes RowViews"""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# ============ PERSISTENT INDEX ============
+def _data_name(filepath):
+    """Path of a CSV relative to DATA_DIR (just the file name for CSVs outside it)"""
+    filepath = Path(filepath)
+    try:
+        return filepath.relative_to(DATA_DIR)
+    except ValueError:
+        return Path(filepath.name)
+
+
+def _index_path(filepath):
+    """Index file for a CSV under DATA_DIR, e.g. data/stacks/react.csv -> index/stacks/react.idx"""
+    return DATA_DIR.parent / INDEX_DIR_NAME / _data_name(filepath).with_suffix(".idx")
+
+
+def _file_stat(filepath):
+    """Cheap change signature: (mtime_ns, size)"""
+    st = os.stat(filepath)
+    return st.st_mtime_ns, st.st_size
+
+
+def _sha256(data):
+    import hashlib  # Only needed when a CSV's stat changed; keeps CLI startup cheap
+    return hashlib.sha256(data).hexdigest()
+
+
+def _content_hash(filepath):
+    """SHA-256 of the raw CSV bytes"""
+    with open(filepath, 'rb') as f:
+        return _sha256(f.read())
+
+
+def _source_signature(filepath):
+    """Stored freshness signature of a CSV: {mtime_ns, size, sha256} (see _source_fresh)"""
+    mtime_ns, size = _file_stat(filepath)
+    return {"mtime_ns": mtime_ns, "size": size, "sha256": _content_hash(filepath)}
+
+
+def _write_index(path, artifact, default=None):
+    """Atomically write a JSON index artifact; silently skip on read-only trees"""
+    import json  # Only the on-disk result cache writes JSON; keeps CLI startup cheap
+    try:
+        _write_bytes(path, json.dumps(artifact, ensure_ascii=False, separators=(',', ':'), default=default).encode('utf-8'))
+    except OSError:
+        pass  # Target held open by another process (Windows); a cache entry can just stay stale
+
+
+def _write_bytes(path, data):
+    """
+    Atomically replace path with data. Returns False without writing on read-only trees;
+    raises OSError if the replace itself fails (Windows: the old file is still mapped).
+    """
+    tmp = path.with_name(path.name + f".{os.getpid()}.{_thread.get_ident()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, 'wb') as f:
+            f.write(data)
+    except OSError:
+        _remove(tmp)
+        return False
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        _remove(tmp)
+        raise
+    return True
+
+
+def _remove(path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+ARRAYS_MAGIC = b"UIPROAR2"  # Files from before the marshal header (UIPROARR) are rejected and rebuilt
+
+
+def _pack_arrays(header, arrays):
+    """
+    Serialize a header dict plus named array.array (or memoryview) blocks as one binary file image.
+    Layout: magic, u64 header length, marshal'd header, then each array 8-byte aligned,
+    so _map_arrays() can expose them zero-copy. The header is marshal rather than JSON
+    so loading an index needs no import beyond the interpreter's own.
+    """
+    layout, blocks, offset = {}, [], 0
+    for name, values in arrays.items():
+        data = values.tobytes()
+        typecode = getattr(values, "typecode", None) or values.format  # array.array or mapped memoryview
+        layout[name] = {"typecode": typecode, "offset": offset, "length": len(values)}
+        blocks.append(data + b"\0" * (-len(data) % 8))
+        offset += len(blocks[-1])
+    meta = marshal.dumps({**header, "byteorder": sys.byteorder, "arrays": layout})
+    meta += b"\0" * (-(len(ARRAYS_MAGIC) + 8 + len(meta)) % 8)
+    return b"".join([ARRAYS_MAGIC, len(meta).to_bytes(8, 'little'), meta] + blocks)
+
+
+# Index files whose replace failed because a superseded index still maps them -> file contents
+_deferred_writes = {}
+
+
+def _write_arrays(path, header, arrays):
+    """
+    Atomically write a _pack_arrays() file; silently skip on read-only trees. While the
+    old file is still mapped by a superseded index (Windows cannot replace it), the write
+    is deferred and retried once that index is retired (see _flush_deferred_writes).
+    """
+    _write_or_defer(path, _pack_arrays(header, arrays))
+
+
+def _write_or_defer(path, data):
+    try:
+        _write_bytes(path, data)
+    except OSError:
+        _deferred_writes[str(path)] = data
+        _count("deferred_writes")
+    else:
+        _deferred_writes.pop(str(path), None)  # A queued older image must not overwrite this one
+
+
+def _flush_deferred_writes(paths=None):
+    """Retry deferred index writes (all or those for paths); each stays queued while its target is still mapped"""
+    for path in list(_deferred_writes) if paths is None else [p for p in map(str, paths) if p in _deferred_writes]:
+        data = _deferred_writes.get(path)
+        if data is None:
+            continue  # Written meanwhile by another thread
+        try:
+            _write_bytes(Path(path), data)
+        except OSError:
+            continue
+        if _deferred_writes.get(path) is data:
+            del _deferred_writes[path]
+
+
+class _MappedArrays:
+    """
+    A _write_arrays() file memory-mapped read-only: .header (dict) and .arrays
+    ({name: memoryview}, each cast to its typecode). Pages are loaded on first access
+    and shared between processes. Indexes built on .arrays keep the mapping alive;
+    close() (or leaving a with block) unmaps it when nothing else uses it, and must
+    come before the same file is rewritten - Windows cannot replace a mapped file.
+    With mapped=False the file is loaded with a single read instead (the data bundle).
+    """
+
+    def __init__(self, path, mapped=True):
+        with open(path, 'rb') as f:
+            if mapped:
+                import mmap  # Not needed when the data bundle serves every lookup
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._mm = None
+                data = f.read()
+        self._view = memoryview(self._mm if mapped else data)
+        self.arrays = {}
+        try:
+            view, start = self._view, len(ARRAYS_MAGIC) + 8
+            if view[:len(ARRAYS_MAGIC)] != ARRAYS_MAGIC:
+                raise ValueError(f"Not an array file: {path}")
+            meta_len = int.from_bytes(view[len(ARRAYS_MAGIC):start], 'little')
+            try:
+                self.header = marshal.loads(view[start:start + meta_len])
+            except (EOFError, TypeError) as exc:
+                raise ValueError(f"Truncated array file: {path}") from exc
+            if self.header.get("version") != INDEX_VERSION or self.header.get("byteorder") != sys.byteorder:
+                raise ValueError(f"Incompatible array file: {path}")
+            start += meta_len
+            for name, block in self.header["arrays"].items():
+                # Every block starts and the file ends 8-byte aligned, so the tail casts to any typecode
+                self.arrays[name] = view[start + block["offset"]:].cast(block["typecode"])[:block["length"]]
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        """Release the array views and unmap the file (BufferError if views derived from them are still alive)"""
+        for view in self.arrays.values():
+            view.release()
+        self._view.release()
+        if self._mm is not None:
+            self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _map_arrays(path):
+    """Memory-map a _write_arrays() file. Raises OSError/ValueError if missing or not readable here"""
+    if _deferred_writes:
+        _flush_deferred_writes([path])  # Map the newest image if its superseded mapping is gone by now
+    return _MappedArrays(path)
+
+
+def _remap_refreshed(path, mapped):
+    """
+    Rewrite a mapped file whose header changed in place (a refreshed source stat) and map it again.
+    The old mapping is closed first so the replace also works on Windows. If another index
+    still maps the file the rewrite is deferred and the unchanged file is mapped again, so
+    callers keep their refreshed header themselves.
+    """
+    with mapped:
+        data = _pack_arrays(mapped.header, mapped.arrays)
+    _write_or_defer(path, data)
+    return _map_arrays(path)
+
+
+class _Terms:
+    """Sorted UTF-8 term list in mapped arrays, with binary-search lookup of term ids"""
+
+    __slots__ = ("offsets", "blob", "_ids")
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+        self._ids = {}  # term -> id (or -1), filled as queries look terms up
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def term(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    def id(self, term):
+        """Id of term, or -1 when absent"""
+        tid = self._ids.get(term)
+        if tid is None:
+            key, offsets, blob = term.encode('utf-8'), self.offsets, self.blob
+            lo, hi = 0, len(self)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if blob[offsets[mid]:offsets[mid + 1]].tobytes() < key:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            tid = lo if lo < len(self) and blob[offsets[lo]:offsets[lo + 1]].tobytes() == key else -1
+            self._ids[term] = tid
+        return tid
+
+
+class _TermTable(Mapping):
+    """Read-only term -> value mapping over mapped arrays; value(term_id) computes each value on access"""
+
+    __slots__ = ("_terms", "_value")
+
+    def __init__(self, terms, value):
+        self._terms = terms
+        self._value = value
+
+    def __getitem__(self, term):
+        tid = self._terms.id(term)
+        if tid < 0:
+            raise KeyError(term)
+        return self._value(tid)
+
+    def __contains__(self, term):
+        return self._terms.id(term) >= 0
+
+    def __iter__(self):
+        return (self._terms.term(i) for i in range(len(self._terms)))
+
+    def __len__(self):
+        return len(self._terms)
+
+
+class _LazySequence(Sequence):
+    """Read-only sequence over mapped arrays; item(i) computes each item on access"""
+
+    __slots__ = ("_n", "_item")
+
+    def __init__(self, n, item):
+        self._n = n
+        self._item = item
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._item(j) for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return self._item(i)
+
+
+def _search_documents(rows, search_cols, start=0):
+    """Searchable text of each row from start on: its search columns joined by spaces"""
+    return [" ".join(str(rows.value(idx, col, "")) for col in search_cols) for idx in range(start, len(rows))]
+
+
+def _parse_csv(filepath):
+    """RowStore of a CSV parsed from text"""
+    import csv  # Only index builds parse CSVs; keeps CLI startup cheap
+    with open(filepath, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        columns = list(reader.fieldnames or [])
+        return RowStore(columns, [[row.get(col) for col in columns] for row in reader])
+
+
+def build_index(filepath, search_cols):
+    """Parse the CSV, fit BM25 and persist the index file. Returns (rows, bm25)"""
+    filepath = Path(filepath)
+    source = {"file": filepath.name, **_source_signature(filepath)}
+
+    with profile_stage("csv"):
+        data = _parse_csv(filepath)
+
+    with profile_stage("fit"):
+        bm25 = BM25()
+        bm25.fit(_search_documents(data, search_cols))
+
+    with profile_stage("write"):
+        rows_state, rows_arrays = data.to_arrays()
+        bm25_state, bm25_arrays = bm25.to_arrays()
+        header = {"version": INDEX_VERSION, "kind": "bm25", "source": source, "search_cols": list(search_cols),
+                  "rows": rows_state, "bm25": bm25_state}
+        _write_arrays(_index_path(filepath), header, {**rows_arrays, **bm25_arrays})
+    _remember_source(filepath, source, data)
+    return data, bm25
+
+
+def load_index(filepath, search_cols):
+    """
+    Load (rows, bm25) for a CSV from the data bundle or its prebuilt index file.
+
+    The index file is memory-mapped read-only and read in place, so processes
+    searching the same data share its pages through the OS page cache instead of
+    each unpickling or parsing a private copy. It is reused while the CSV mtime/size
+    match. If they changed but the content hash did not (touch, checkout), the
+    stored stat is refreshed; otherwise the index is rebuilt from the CSV.
+    """
+    filepath = Path(filepath)
+    bundled = _bundled_index(filepath, search_cols)
+    if bundled is not None:
+        return bundled
+    path = _index_path(filepath)
+    try:
+        with profile_stage("map"):
+            mapped = _map_arrays(path)
+    except (OSError, ValueError):
+        return build_index(filepath, search_cols)
+    header = mapped.header
+    fresh = (header.get("kind") == "bm25" and header.get("search_cols") == list(search_cols)
+             and Analyzer.current(header["bm25"].get("analyzer", ORIGINAL_ANALYZER)))
+    touched = False
+    if fresh:
+        fresh, touched = _source_fresh(header["source"], filepath)
+    if not fresh:
+        mapped.close()  # Unmapped before build_index replaces the file
+        return build_index(filepath, search_cols)
+    if touched:
+        source = header["source"]
+        try:
+            mapped = _remap_refreshed(path, mapped)
+        except (OSError, ValueError):
+            return build_index(filepath, search_cols)
+        header = dict(mapped.header, source=source)  # Refreshed stat even if the tree is read-only
+
+    data = RowStore.from_arrays(header["rows"], mapped.arrays)
+    _remember_source(filepath, header["source"], data)
+    return data, BM25.from_arrays(header["bm25"], mapped.arrays)
+
+
+def _source_fresh(source, filepath):
+    """
+    Check a stored {mtime_ns, size, sha256} signature against the CSV on disk.
+    Returns (fresh, touched); touched means only the mtime moved and was refreshed in place.
+    """
+    mtime_ns, size = _file_stat(filepath)
+    if (source["mtime_ns"], source["size"]) == (mtime_ns, size):
+        return True, False
+    if source["size"] != size or source["sha256"] != _content_hash(filepath):
+        return False, False
+    source["mtime_ns"] = mtime_ns
+    return True, True
+
+
+def _index_targets():
+    """(csv filename, search_cols) for every domain and stack"""
+    targets = [(cfg["file"], cfg["search_cols"]) for cfg in CSV_CONFIG.values()]
+    targets += [(cfg["file"], _STACK_COLS["search_cols"]) for cfg in STACK_CONFIG.values()]
+    return targets
+
+
+def build_all_indexes():
+    """Prebuild artifacts for every domain and stack CSV. Returns list of index paths"""
+    built = []
+    for filename, search_cols in _index_targets():
+        filepath = DATA_DIR / filename
+        if filepath.exists():
+            build_index(filepath, search_cols)
+            built.append(str(_index_path(filepath)))
+    return built
+
+
+# ============ INCREMENTAL UPDATES ============
+_loaded_sources = {}  # CSV path -> signature and row count of the last index loaded for it
+
+
+def _remember_source(filepath, source, rows, appends=0):
+    _loaded_sources[str(filepath)] = {
+        "mtime_ns": source["mtime_ns"], "size": source["size"], "sha256": source["sha256"],
+        "rows": len(rows), "appends": appends
+    }
+
+
+def append_index(filepath, search_cols, rows, bm25):
+    """
+    Extend a resident (rows, bm25) with the rows appended to its CSV since it was loaded.
+
+    Only the new rows are parsed and tokenized; the result is built next to the old
+    pair, which keeps serving readers. Returns None when the change is not a pure
+    append (rows edited or removed), so the caller reloads in full. Every
+    COMPACT_EVERY appends the index is compacted instead: refitted and persisted.
+    """
+    base = _loaded_sources.get(str(filepath))
+    if base is None or base["rows"] != len(rows):
+        return None
+    st = os.stat(filepath)
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    head, tail = data[:base["size"]], data[base["size"]:]
+    if not tail or _sha256(head) != base["sha256"]:
+        return None
+    if not head.endswith((b"\n", b"\r")) and not tail.startswith((b"\n", b"\r")):
+        return None  # The old last row itself was extended
+    if base["appends"] + 1 >= COMPACT_EVERY:
+        return build_index(filepath, search_cols)
+
+    import csv
+    width = len(rows.columns)
+    table = [(cells + [None] * width)[:width] for cells in csv.reader(io.StringIO(tail.decode('utf-8'))) if cells]
+    new_rows = rows.extended(table)
+    new_bm25 = bm25.copy()
+    new_bm25.add_documents(_search_documents(new_rows, search_cols, len(rows)))
+
+    source = {"mtime_ns": st.st_mtime_ns, "size": len(data), "sha256": _sha256(data)}
+    _remember_source(filepath, source, new_rows, base["appends"] + 1)
+    return new_rows, new_bm25
+
+
+# ============ INDEX MANAGER ============
+class IndexManager:
+    """
+    Thread-safe owner of the resident indexes.
+
+    Readers take the current snapshot (key -> (signature, value)) without locking.
+    Writers build a replacement off to the side and publish a new snapshot dict by
+    swapping one reference (read-copy-update), so a reader never sees a half-built
+    index. With start(), a background thread polls source signatures (CSV mtime/size)
+    and rebuilds changed indexes; readers then never block on a reload and keep the
+    previous index until its replacement is published.
+
+    on_replace() runs after values were replaced, once the manager dropped its own
+    references to them, to retire what the superseded values still hold (mappings).
+    """
+
+    def __init__(self, on_replace=None):
+        self._snapshot = {}
+        self._on_replace = on_replace
+        self._sources = {}      # key -> (signature_fn, loader) for the watcher
+        self._lock = _thread.allocate_lock()
+        self._key_locks = {}
+        self._stop = None       # threading.Event while a watcher runs
+        self._watcher = None
+
+    @property
+    def watching(self):
+        return self._watcher is not None and self._watcher.is_alive()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, _thread.allocate_lock())
+
+    def _publish(self, key, entry, source=None):
+        with self._lock:
+            snapshot = dict(self._snapshot)
+            if entry is None:
+                snapshot.pop(key, None)
+            else:
+                snapshot[key] = entry
+            if source is not None:
+                self._sources[key] = source
+            self._snapshot = snapshot
+
+    def get(self, key, signature, loader, updater=None):
+        """
+        Resident value for key, loading it with loader() on a miss.
+        signature() returns the current source signature (e.g. CSV stat); without a
+        watcher it is checked on every read, with one the watcher owns freshness.
+        updater(old_value), if given, is tried first when a resident value goes stale
+        and returns the updated value, or None to fall back to loader().
+        """
+        entry = self._snapshot.get(key)
+        if entry is not None and (self.watching or entry[0] == signature()):
+            return entry[1]
+
+        with self._key_lock(key):
+            entry = self._snapshot.get(key)  # Another thread may have just loaded it
+            sig = signature()
+            if entry is not None and entry[0] == sig:
+                return entry[1]
+            value = self._reload(entry, loader, updater)
+            self._publish(key, (sig, value), (signature, loader, updater))
+            replaced, entry = entry is not None, None
+        if replaced:
+            self._retire()
+        return value
+
+    def _retire(self):
+        if self._on_replace is not None:
+            self._on_replace()
+
+    @staticmethod
+    def _reload(entry, loader, updater):
+        """Incremental update of a stale entry when possible, else a full load"""
+        if entry is not None and updater is not None:
+            value = updater(entry[1])
+            if value is not None:
+                return value
+        return loader()
+
+    def peek(self, key):
+        """(signature, value) if resident, else None - never loads"""
+        return self._snapshot.get(key)
+
+    def discard(self, key):
+        self._publish(key, None)
+        self._retire()
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = {}
+        self._retire()
+
+    def refresh(self):
+        """Rebuild every resident index whose source signature changed. Returns rebuilt keys"""
+        rebuilt = []
+        for key, (signature, loader, updater) in list(self._sources.items()):
+            with self._key_lock(key):
+                # Under the lock: a reader may have just reloaded this key
+                entry = self._snapshot.get(key)
+                try:
+                    sig = signature()
+                except OSError:
+                    continue  # Source missing mid-edit; keep serving the previous index
+                if entry is None or entry[0] == sig:
+                    continue
+                try:
+                    value = self._reload(entry, loader, updater)
+                except Exception:
+                    continue  # Half-written CSV etc.; retry on the next poll
+                self._publish(key, (sig, value))
+                entry = None
+            rebuilt.append(key)
+        if rebuilt:
+            self._retire()
+        return rebuilt
+
+    def start(self, poll_interval=POLL_INTERVAL):
+        """Start the background change watcher (idempotent)"""
+        import threading  # Only the daemon watches; one-off searches never pay for threading
+        if self.watching:
+            return
+        stop = self._stop = threading.Event()
+
+        def watch():
+            while not stop.wait(poll_interval):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=watch, name="uipro-index-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+def _retire_superseded():
+    """
+    Release what replaced indexes still hold: cached results keep rows of the index they
+    came from, so they are dropped too; once nothing maps the old files, the deferred
+    rewrites of them go through.
+    """
+    RESULTS.clear()
+    if _deferred_writes:
+        _flush_deferred_writes()
+
+
+INDEXES = IndexManager(_retire_superseded)
+
+
+def get_index(filepath, search_cols):
+    """(rows, bm25) for a CSV, kept resident in-process and extended incrementally when rows are appended"""
+    return INDEXES.get(str(filepath), lambda: _file_stat(filepath), lambda: load_index(filepath, search_cols),
+                       lambda value: append_index(filepath, search_cols, *value))
+
+
+def warm_indexes():
+    """Load every domain and stack index into the resident cache. Returns count loaded"""
+    loaded = 0
+    for filename, search_cols in _index_targets():
+        filepath = DATA_DIR / filename
+        if filepath.exists():
+            get_index(filepath, search_cols)
+            loaded += 1
+    return loaded
+
+
+# ============ UNIFIED INDEX ============
+UNIFIED_INDEX_FILE = "_unified.idx"
+
+
+def _unified_path():
+    return DATA_DIR.parent / INDEX_DIR_NAME / UNIFIED_INDEX_FILE
+
+
+def _unified_sources():
+    """Every domain and stack as (kind, name, file, search_cols, output_cols), in a fixed order"""
+    sources = [("domain", name, cfg["file"], cfg["search_cols"], cfg["output_cols"]) for name, cfg in CSV_CONFIG.items()]
+    sources += [("stack", name, cfg["file"], _STACK_COLS["search_cols"], _STACK_COLS["output_cols"])
+                for name, cfg in STACK_CONFIG.items()]
+    return [src for src in sources if (DATA_DIR / src[2]).exists()]
+
+
+class UnifiedIndex:
+    """
+    One BM25 over every domain and stack CSV. Each document keeps its source
+    (domain or stack) as a facet, so a single scoring pass can rank across
+    all sources or be restricted to a subset.
+    """
+
+    def __init__(self, sources, stores, doc_source, bm25):
+        self.sources = sources          # [(kind, name, file, search_cols, output_cols)]
+        self.stores = stores            # RowStore per source
+        self.doc_source = doc_source    # source index per document
+        self.offsets = []               # first document id of each source
+        total = 0
+        for store in stores:
+            self.offsets.append(total)
+            total += len(store)
+        self.bm25 = bm25
+
+    @classmethod
+    def build(cls):
+        """Merge the per-source indexes (already tokenized) and fit one BM25. Persists the index file"""
+        sources = _unified_sources()
+        stores, doc_source, corpus, stored_sources, arrays = [], [], [], [], {}
+        for i, (kind, name, filename, search_cols, output_cols) in enumerate(sources):
+            filepath = DATA_DIR / filename
+            data, bm25 = get_index(filepath, search_cols)
+            rows_state, rows_arrays = data.to_arrays()
+            stored_sources.append({"file": filename, **_source_signature(filepath), "rows": rows_state})
+            arrays.update((f"{i}.{key}", values) for key, values in rows_arrays.items())
+            stores.append(data)
+            doc_source.extend([i] * len(data))
+            corpus.extend(bm25.corpus)
+
+        bm25 = BM25()
+        bm25.fit_tokenized(corpus)
+        bm25_state, bm25_arrays = bm25.to_arrays()
+        _write_arrays(_unified_path(), {
+            "version": INDEX_VERSION,
+            "kind": "unified",
+            "sources": stored_sources,
+            "bm25": bm25_state
+        }, {**arrays, **bm25_arrays})
+        return cls(sources, stores, doc_source, bm25)
+
+    @classmethod
+    def load(cls):
+        """Map the unified index file zero-copy (or take it from the bundle), rebuilding it if any source CSV changed"""
+        sources = _unified_sources()
+        bundled = cls._from_bundle(sources)
+        if bundled is not None:
+            return bundled
+        path = _unified_path()
+        try:
+            mapped = _map_arrays(path)
+        except (OSError, ValueError):
+            return cls.build()
+        header = mapped.header
+        fresh = (header.get("kind") == "unified"
+                 and [src["file"] for src in header["sources"]] == [src[2] for src in sources]
+                 and Analyzer.current(header["bm25"].get("analyzer", ORIGINAL_ANALYZER)))
+        touched = False
+        for src in header["sources"] if fresh else ():
+            fresh, refreshed = _source_fresh(src, DATA_DIR / src["file"])
+            if not fresh:
+                break
+            touched = touched or refreshed
+        if not fresh:
+            mapped.close()  # Unmapped before build replaces the file
+            return cls.build()
+        if touched:
+            stored_sources = header["sources"]
+            try:
+                mapped = _remap_refreshed(path, mapped)
+            except (OSError, ValueError):
+                return cls.build()
+            header = dict(mapped.header, sources=stored_sources)
+
+        stores, doc_source = [], []
+        for i, src in enumerate(header["sources"]):
+            prefix = f"{i}."
+            rows_arrays = {key[len(prefix):]: values for key, values in mapped.arrays.items() if key.startswith(prefix)}
+            stores.append(_resident_rows(src) or RowStore.from_arrays(src["rows"], rows_arrays))
+            doc_source.extend([i] * src["rows"]["n"])
+        return cls(sources, stores, doc_source, BM25.from_arrays(header["bm25"], mapped.arrays))
+
+    @classmethod
+    def _from_bundle(cls, sources):
+        """Unified index from the data bundle, or None if it is missing or any source changed"""
+        bundle = _bundle()
+        unified = bundle[0].get("unified") if bundle else None
+        if (unified is None or unified["files"] != [src[2] for src in sources]
+                or not Analyzer.current(unified["bm25"].get("analyzer", ORIGINAL_ANALYZER))):
+            return None
+        stores, doc_source = [], []
+        for i, filename in enumerate(unified["files"]):
+            found = _bundle_entry(DATA_DIR / filename)
+            if found is None:
+                return None
+            entry, arrays = found
+            stores.append(_resident_rows(entry) or RowStore.from_arrays(entry["rows"], arrays))
+            doc_source.extend([i] * entry["rows"]["n"])
+        return cls(sources, stores, doc_source, BM25.from_arrays(unified["bm25"], bundle[1]["unified"]))
+
+    def select(self, domains=None, stacks=None):
+        """Per-document allow mask for the given domain/stack names (None = no filter)"""
+        if domains is None and stacks is None:
+            return None
+        wanted = {("domain", d) for d in domains or []} | {("stack", st) for st in stacks or []}
+        chosen = [(src[0], src[1]) in wanted for src in self.sources]
+        return [chosen[i] for i in self.doc_source]
+
+    def search(self, query, max_results=MAX_RESULTS, domains=None, stacks=None):
+        """Top results across the selected sources, each tagged with its Domain or Stack"""
+        ranked = self.bm25.top_k(query, max_results, allowed=self.select(domains, stacks))
+        profile = _current_profile()
+        if profile is not None:
+            with profile_stage("explain"):
+                profile.explain(UNIFIED_INDEX_FILE, query, "bm25", ranked, self.bm25)
+
+        results = []
+        with profile_stage("format"):
+            for idx, score in ranked:
+                src = self.doc_source[idx]
+                kind, name, _, _, output_cols = self.sources[src]
+                tag = ("Stack" if kind == "stack" else "Domain", name)
+                results.append(self.stores[src].project(idx - self.offsets[src], output_cols, tag))
+        return results
+
+
+def _resident_rows(src):
+    """RowStore of an already-resident per-file index matching a stored source signature, else None"""
+    resident = INDEXES.peek(str(DATA_DIR / src["file"]))
+    if resident is not None and resident[0] == (src["mtime_ns"], src["size"]):
+        return resident[1][0]
+    return None
+
+
+def get_unified_index():
+    """UnifiedIndex kept resident in-process while no source CSV changes"""
+    def signature():
+        return tuple(_file_stat(DATA_DIR / src[2]) for src in _unified_sources())
+    return INDEXES.get(UNIFIED_INDEX_FILE, signature, UnifiedIndex.load)
+
+
+# ============ VECTOR INDEX ============
+VECTOR_SEED = 20240601  # Fixed so LSH hyperplanes are identical across builds and processes
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def hash_features(text, dims=VECTOR_DIMS):
+    """
+    Hashing-vectorizer features of text as a sparse {dim: weight} dict (not normalized).
+    Words and their boundary-marked character trigrams ("#an", "ani", ...) are hashed
+    (crc32) to signed dimensions, so inflections and compounds still overlap and no
+    vocabulary is stored.
+    """
+    from zlib import crc32  # Only vector/hybrid searches hash features; keeps zlib off the BM25 startup path
+    counts = defaultdict(int)
+    for word in _WORD_RE.findall(str(text).lower()):
+        if len(word) < 2:
+            continue
+        counts[" " + word] += 1  # Leading space keeps word features apart from trigrams
+        marked = f"#{word}#"
+        for i in range(len(marked) - 2):
+            counts[marked[i:i + 3]] += 1
+    features = defaultdict(float)
+    for feature, count in counts.items():
+        h = crc32(feature.encode('utf-8'))
+        weight = (1.0 + log(count)) * (1.0 if feature[0] == " " else 0.5)
+        features[h % dims] += weight if h & 0x80000000 else -weight
+    return features
+
+
+def _normalize(vector):
+    """L2-normalize a sparse {dim: weight} vector, dropping zero weights"""
+    norm = sum(w * w for w in vector.values()) ** 0.5
+    return {dim: w / norm for dim, w in vector.items() if w} if norm else {}
+
+
+def _lsh_key(planes, dims, bits, table, vector):
+    """Bucket of a sparse vector in one LSH table: one bit per hyperplane side"""
+    key = 0
+    for b in range(bits):
+        offset = (table * bits + b) * dims
+        if sum(planes[offset + dim] * w for dim, w in vector.items()) > 0:
+            key |= 1 << b
+    return key
+
+
+class VectorIndex:
+    """
+    Approximate nearest-neighbour index over hashing-vectorizer embeddings.
+
+    Document vectors are IDF-weighted and L2-normalized (dot product = cosine) and
+    kept as one float32 array in a memory-mapped file next to the BM25 artifact.
+    Random-projection LSH narrows a query to documents sharing its bucket, or one
+    a single bit away, in any table; only those candidates are scored exactly.
+    """
+
+    def __init__(self, header, arrays):
+        self.dims = header["dims"]
+        self.tables = header["tables"]
+        self.bits = header["bits"]
+        self.N = header["n"]
+        self.vectors = arrays["vectors"]    # N x dims float32, row-major
+        self.idf = arrays["idf"]            # dims
+        self.planes = arrays["planes"]      # tables x bits x dims hyperplane normals
+        signatures = arrays["signatures"]   # N x tables bucket keys
+        self.buckets = [defaultdict(list) for _ in range(self.tables)]
+        for idx in range(self.N):
+            for table in range(self.tables):
+                self.buckets[table][signatures[idx * self.tables + table]].append(idx)
+
+    @classmethod
+    def build(cls, documents, header=None, path=None):
+        """Embed documents and hash them into LSH buckets; persisted to path when given"""
+        import array
+        import random  # Build-time only; keeps CLI startup cheap
+
+        dims, tables, n = VECTOR_DIMS, LSH_TABLES, len(documents)
+        bits = max(1, min(16, (n // LSH_BUCKET_SIZE).bit_length()))
+        features = [hash_features(doc, dims) for doc in documents]
+
+        df = [0] * dims
+        for doc in features:
+            for dim in doc:
+                df[dim] += 1
+        idf = array.array('f', (log((n + 1) / (df[dim] + 1)) + 1 for dim in range(dims)))
+
+        rng = random.Random(VECTOR_SEED)
+        planes = array.array('f', (rng.gauss(0.0, 1.0) for _ in range(tables * bits * dims)))
+        vectors = array.array('f', bytes(4 * n * dims))
+        signatures = array.array('I', bytes(4 * n * tables))
+        for idx, doc in enumerate(features):
+            vector = _normalize({dim: w * idf[dim] for dim, w in doc.items()})
+            for dim, w in vector.items():
+                vectors[idx * dims + dim] = w
+            for table in range(tables):
+                signatures[idx * tables + table] = _lsh_key(planes, dims, bits, table, vector)
+
+        header = {"version": INDEX_VERSION, "kind": "vector", **(header or {}),
+                  "dims": dims, "tables": tables, "bits": bits, "n": n}
+        arrays = {"vectors": vectors, "idf": idf, "planes": planes, "signatures": signatures}
+        if path is not None:
+            _write_arrays(path, header, arrays)
+        return cls(header, arrays)
+
+    def embed(self, text):
+        """Normalized sparse query vector in this index's space"""
+        idf = self.idf
+        return _normalize({dim: w * idf[dim] for dim, w in hash_features(text, self.dims).items()})
+
+    def query(self, text, k):
+        """Up to k (doc_id, cosine) pairs with cosine > 0, best first (ties by doc_id)"""
+        vector = self.embed(text)
+        if k <= 0 or not vector:
+            return []
+
+        candidates = set()
+        for table, buckets in enumerate(self.buckets):
+            key = _lsh_key(self.planes, self.dims, self.bits, table, vector)
+            for probe in [key] + [key ^ (1 << b) for b in range(self.bits)]:
+                candidates.update(buckets.get(probe, ()))
+        if len(candidates) < k:
+            candidates = range(self.N)  # Too few neighbours hashed together; scan exactly
+
+        vectors, dims, scored = self.vectors, self.dims, []
+        for idx in candidates:
+            base = idx * dims
+            score = sum(vectors[base + dim] * w for dim, w in vector.items())
+            if score > 0:
+                scored.append((idx, score))
+        return heapq.nsmallest(k, scored, key=lambda item: (-item[1], item[0]))
+
+
+def _vector_path(filepath):
+    """Vector file for a CSV, e.g. data/stacks/react.csv -> index/stacks/react.vec"""
+    return _index_path(filepath).with_suffix(".vec")
+
+
+def build_vector_index(filepath, search_cols):
+    """Embed the CSV's search columns and persist the vector file. Returns a VectorIndex"""
+    filepath = Path(filepath)
+    source = {"file": filepath.name, **_source_signature(filepath)}
+    rows, _ = get_index(filepath, search_cols)
+    header = {"source": source, "search_cols": list(search_cols)}
+    return VectorIndex.build(_search_documents(rows, search_cols), header, _vector_path(filepath))
+
+
+def load_vector_index(filepath, search_cols):
+    """Map the CSV's vector file zero-copy, rebuilding it when missing, outdated or stale"""
+    filepath = Path(filepath)
+    try:
+        mapped = _map_arrays(_vector_path(filepath))
+    except (OSError, ValueError):
+        return build_vector_index(filepath, search_cols)
+    header = mapped.header
+    if (header.get("kind") != "vector" or header.get("search_cols") != list(search_cols)
+            or header.get("dims") != VECTOR_DIMS or header.get("tables") != LSH_TABLES
+            or not _source_fresh(header["source"], filepath)[0]):
+        mapped.close()  # Unmapped before build_vector_index replaces the file
+        return build_vector_index(filepath, search_cols)
+    return VectorIndex(header, mapped.arrays)
+
+
+def get_vector_index(filepath, search_cols):
+    """VectorIndex for a CSV, kept resident in-process while the CSV is unchanged"""
+    return INDEXES.get(str(filepath) + "#vector", lambda: _file_stat(filepath),
+                       lambda: load_vector_index(filepath, search_cols))
+
+
+def fuse_rankings(rankings, k):
+    """Reciprocal rank fusion of several [(doc_id, score)] rankings into the top k (doc_id, fused score)"""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, (idx, _) in enumerate(ranking, 1):
+            fused[idx] += 1.0 / (RRF_K + rank)
+    return heapq.nsmallest(k, fused.items(), key=lambda item: (-item[1], item[0]))
+
+
+# ============ DATA BUNDLE ============
+BUNDLE_FILE = "_bundle.idx"
+
+
+def _bundle_path():
+    return DATA_DIR.parent / INDEX_DIR_NAME / BUNDLE_FILE
+
+
+def build_bundle():
+    """
+    Pack every data CSV's parsed rows, its BM25 index and the unified index into one
+    array file for fast CLI start: a one-off query loads it with a single read instead
+    of mapping one index file per source. Returns the bundle path; raises OSError if
+    it cannot be written.
+    """
+    targets = dict(_index_targets())
+    entries, arrays = {}, {}
+    for i, filepath in enumerate(sorted(DATA_DIR.rglob("*.csv"))):
+        name = _data_name(filepath).as_posix()
+        entry = {"file": name, **_source_signature(filepath), "prefix": str(i), "search_cols": None, "bm25": None}
+        if name in targets:
+            entry["search_cols"] = list(targets[name])
+            rows, bm25 = build_index(filepath, targets[name])
+            entry["bm25"], bm25_arrays = bm25.to_arrays()
+            arrays.update((f"{i}.{key}", values) for key, values in bm25_arrays.items())
+        else:
+            rows = _parse_csv(filepath)
+        entry["rows"], rows_arrays = rows.to_arrays()
+        arrays.update((f"{i}.{key}", values) for key, values in rows_arrays.items())
+        entries[name] = entry
+
+    unified = UnifiedIndex.build()
+    bm25_state, bm25_arrays = unified.bm25.to_arrays()
+    arrays.update((f"unified.{key}", values) for key, values in bm25_arrays.items())
+    path = _bundle_path()
+    header = {"version": INDEX_VERSION, "kind": "bundle", "entries": entries,
+              "unified": {"files": [src[2] for src in unified.sources], "bm25": bm25_state}}
+    if not _write_bytes(path, _pack_arrays(header, arrays)):
+        raise OSError(f"Cannot write the data bundle: {path}")
+    return path
+
+
+def _bundle_signature():
+    try:
+        return _file_stat(_bundle_path())
+    except OSError:
+        return None
+
+
+def _read_bundle():
+    """(header, {prefix: {name: array}}) from a single read of the bundle, or None if missing or outdated"""
+    try:
+        bundle = _MappedArrays(_bundle_path(), mapped=False)
+    except (OSError, ValueError):
+        return None
+    if bundle.header.get("kind") != "bundle":
+        return None
+    groups = defaultdict(dict)
+    for key, values in bundle.arrays.items():
+        prefix, _, name = key.partition(".")
+        groups[prefix][name] = values
+    return bundle.header, groups
+
+
+def _bundle():
+    return INDEXES.get(BUNDLE_FILE, _bundle_signature, _read_bundle)
+
+
+def _bundle_entry(filepath):
+    """(entry, arrays) for a data CSV from the bundle while the CSV is unchanged, else None"""
+    bundle = _bundle()
+    entry = bundle[0]["entries"].get(_data_name(filepath).as_posix()) if bundle else None
+    if entry is None or not _source_fresh(entry, filepath)[0]:
+        return None
+    return entry, bundle[1][entry["prefix"]]
+
+
+def _bundled_index(filepath, search_cols):
+    """(rows, bm25) from the bundle while the CSV is unchanged, else None"""
+    found = _bundle_entry(filepath)
+    if found is None:
+        return None
+    entry, arrays = found
+    if entry["search_cols"] != list(search_cols) or not Analyzer.current(entry["bm25"].get("analyzer", ORIGINAL_ANALYZER)):
+        return None
+    rows = RowStore.from_arrays(entry["rows"], arrays)
+    _remember_source(filepath, entry, rows)
+    return rows, BM25.from_arrays(entry["bm25"], arrays)
+
+
+# ============ DATA FILES ============
+def read_rows(filepath):
+    """Rows of any data CSV as dicts - from its resident index or the bundle while unchanged, else parsed"""
+    resident = INDEXES.peek(str(filepath))
+    if resident is not None and resident[0] == _file_stat(filepath):
+        return [row.to_dict() for row in resident[1][0]]
+    found = _bundle_entry(filepath)
+    if found is not None:
+        return [row.to_dict() for row in RowStore.from_arrays(found[0]["rows"], found[1])]
+    return _load_csv(filepath)
+
+
+# ============ RESULT CACHE ============
+def normalize_query(query):
+    """Case- and whitespace-insensitive form of a query (tokenization ignores both)"""
+    return " ".join(str(query).lower().split())
+
+
+def data_version(*filenames):
+    """
+    DATA_DIR, the analyzer settings and the (mtime_ns, size) of data files as one string.
+    Changes when any file is edited or the ranking changes (UIPRO_STEM, UIPRO_NGRAMS)
+    """
+    parts = [f"{INDEX_VERSION}:{DATA_DIR}", "analyzer:{min_length}:{stem}:{ngrams}".format(**Analyzer.shared().config())]
+    for name in filenames:
+        try:
+            parts.append("{}:{}:{}".format(name, *_file_stat(DATA_DIR / name)))
+        except OSError:
+            parts.append(f"{name}:missing")
+    return "|".join(parts)
+
+
+class ResultCache:
+    """
+    Two-level cache for search and design-system results.
+
+    Level 1 is an in-process LRU bounded by max_entries and ttl seconds. Level 2,
+    enabled by disk_dir, keeps one JSON file per key so results survive across
+    processes and sessions; disk hits are promoted into the LRU. Callers put a
+    data_version() in the key, so edited CSVs or other analyzer settings simply
+    stop matching old entries.
+    """
+
+    def __init__(self, max_entries=CACHE_SIZE, ttl=CACHE_TTL, disk_dir=CACHE_DIR):
+        self._entries = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._lock = _thread.allocate_lock()
+        self._stats = dict.fromkeys(("hits", "disk_hits", "misses", "expired", "evictions"), 0)
+        self.disk_dir = None
+        self.configure(max_entries, ttl, disk_dir)
+
+    def configure(self, max_entries=None, ttl=None, disk_dir=None):
+        """Change limits or the disk tier ("" disables it); None leaves a setting unchanged"""
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if ttl is not None:
+            self.ttl = ttl
+        if disk_dir is not None:
+            self.disk_dir = Path(disk_dir) if disk_dir else None
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > max(self.max_entries, 0):
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _disk_path(self, key):
+        import hashlib
+        import json  # The disk tier is opt-in; keeps CLI startup cheap
+        digest = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+        return self.disk_dir / f"{digest}.json"
+
+    def _disk_get(self, key):
+        if self.disk_dir is None:
+            return None
+        import json
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("key") != list(key):
+            return None
+        if time.time() - entry.get("created", 0) >= self.ttl:
+            return None
+        return entry.get("value")
+
+    def get(self, key):
+        """Cached value for a key tuple, or None on a miss"""
+        with profile_stage("cache"):
+            value = self._get(key)
+        _count("cache_misses" if value is None else "cache_hits")
+        return value
+
+    def _get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+                self._stats["expired"] += 1
+
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+        self._remember(key, value)
+        return value
+
+    def _remember(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def put(self, key, value):
+        """Store a JSON-serializable value (RowViews allowed) in every enabled tier"""
+        self._remember(key, value)
+        if self.disk_dir is not None:
+            _write_index(self._disk_path(key), {"key": list(key), "created": time.time(), "value": value},
+                         default=json_default)
+
+    def cached(self, key, compute):
+        """get(key), falling back to compute() and storing its result"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Drop the in-process tier (the disk tier expires by TTL)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters, current size and hit rate"""
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries))
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+RESULTS = ResultCache()
+
+
+# ============ PROFILING ============
+_PROFILE_HOOKS = []
+_active_profile = None  # ContextVar holding the running Profile; created by the first add_profile_hook()
+
+
+class _NoStage:
+    """profile_stage() while profiling is off"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class Profile:
+    """
+    Stage timings, counters and score explanations collected during one
+    instrumented call. Stages may nest (csv/fit run inside load when an index is
+    rebuilt) and overlap across fan-out threads, so stage_totals can exceed total_ms.
+    """
+
+    def __init__(self, call, **info):
+        self.call = call
+        self.info = info
+        self.stages = []        # {"stage", "ms"} in completion order
+        self.counters = {}      # e.g. cache_hits / cache_misses
+        self.explanations = []  # one entry per ranked result, see explain()
+        self.total_ms = None
+        self._lock = _thread.allocate_lock()
+        self._start = time.perf_counter()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def explain(self, source, query, mode, ranked, bm25):
+        """Record why each (doc_id, score) in ranked placed where it did (BM25 breakdown per query term)"""
+        for rank, (idx, score) in enumerate(ranked, 1):
+            self.explanations.append({"source": source, "query": query, "mode": mode, "rank": rank,
+                                      "score": score, **bm25.explain(query, idx)})
+
+    def finish(self):
+        self.total_ms = round((time.perf_counter() - self._start) * 1000, 4)
+
+    def to_dict(self):
+        totals = {}
+        for entry in self.stages:
+            totals[entry["stage"]] = round(totals.get(entry["stage"], 0) + entry["ms"], 4)
+        return {"call": self.call, **self.info, "total_ms": self.total_ms, "stages": self.stages,
+                "stage_totals": totals, "counters": dict(self.counters), "explain": self.explanations}
+
+
+class _Stage:
+    """Context manager recording one Profile.stage() timing"""
+
+    __slots__ = ("_profile", "_name", "_start")
+
+    def __init__(self, profile, name):
+        self._profile = profile
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        ms = round((time.perf_counter() - self._start) * 1000, 4)
+        self._profile.stages.append({"stage": self._name, "ms": ms})
+        return False
+
+
+def add_profile_hook(callback):
+    """
+    Call callback(report) after every search(), search_stack(), search_all() and
+    design-system generation with its Profile as a JSON-serializable dict.
+    Profiling costs nothing while no hook is registered.
+    """
+    global _active_profile
+    if _active_profile is None:
+        import contextvars  # Only profiled runs need it; keeps CLI startup cheap
+        _active_profile = contextvars.ContextVar("uipro_profile", default=None)
+    _PROFILE_HOOKS.append(callback)
+
+
+def remove_profile_hook(callback):
+    _PROFILE_HOOKS.remove(callback)
+
+
+def _current_profile():
+    """The Profile collecting the running call, or None"""
+    return None if _active_profile is None else _active_profile.get()
+
+
+class _Profiled:
+    """Context manager returned by profiled()"""
+
+    def __init__(self, call, info):
+        self._call = call
+        self._info = info
+        self._profile = self._token = None
+
+    def __enter__(self):
+        active = _current_profile()
+        if active is not None or not _PROFILE_HOOKS:
+            return active
+        self._profile = Profile(self._call, **self._info)
+        self._token = _active_profile.set(self._profile)
+        return self._profile
+
+    def __exit__(self, *exc):
+        profile = self._profile
+        if profile is None:
+            return False
+        _active_profile.reset(self._token)
+        profile.finish()
+        report = profile.to_dict()
+        for hook in list(_PROFILE_HOOKS):
+            hook(report)
+        return False
+
+
+def profiled(call, **info):
+    """
+    Profile the enclosed call when a hook is registered. Calls made inside an active
+    profile (the searches of a design system) add to it rather than reporting alone.
+    The with target is the active Profile, or None when profiling is off.
+    """
+    return _Profiled(call, info)
+
+
+def profile_stage(name):
+    """Context manager timing one stage of the active profile (a no-op when profiling is off)"""
+    profile = _current_profile()
+    return _NO_STAGE if profile is None else profile.stage(name)
+
+
+def _count(name):
+    profile = _current_profile()
+    if profile is not None:
+        profile.count(name)
+
 
 # ============ SEARCH FUNCTIONS ============
 def _load_csv(filepath):
     """Load CSV and return list of dicts"""
+    import csv
     with open(filepath, 'r', encoding='utf-8') as f:
         return list(csv.DictReader(f))
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
+def _search_csv(filepath, search_cols, output_cols, query, max_results, mode="bm25"):
+    """Core search function using BM25, the vector index, or both fused (see SEARCH_MODES)"""
     if not filepath.exists():
         return []
 
-    data = _load_csv(filepath)
+    # Resident/prebuilt index (rebuilt automatically when the CSV changes)
+    with profile_stage("load"):
+        data, bm25 = get_index(filepath, search_cols)
+
+    # Top results with score > 0 (bounded heap + MaxScore pruning, no full sort),
+    # returned as lightweight views over the resident RowStore
+    if mode == "vector":
+        with profile_stage("vector"):
+            ranked = get_vector_index(filepath, search_cols).query(query, max_results)
+    elif mode == "hybrid":
+        depth = max_results * HYBRID_DEPTH
+        keyword = bm25.top_k(query, depth)
+        with profile_stage("vector"):
+            semantic = get_vector_index(filepath, search_cols).query(query, depth)
+        ranked = fuse_rankings([keyword, semantic], max_results)
+    else:
+        ranked = bm25.top_k(query, max_results)
+
+    profile = _current_profile()
+    if profile is not None:
+        with profile_stage("explain"):
+            profile.explain(_data_name(filepath).as_posix(), query, mode, ranked, bm25)
+    with profile_stage("format"):
+        return [data.project(idx, output_cols) for idx, score in ranked]
+
+
+# ============ KEYWORD MATCHING ============
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a fixed keyword set. One pass over a text finds
+    every keyword that occurs in it as a substring (same semantics as `kw in text`).
+    """
+
+    def __init__(self, patterns):
+        """patterns: iterable of (keyword, value); find() reports the values of matched keywords"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._always = []  # values of empty keywords, which match every text
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+        for keyword, value in patterns:
+            if not keyword:
+                self._always.append(value)
+                continue
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(value)
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
+        # Breadth-first failure links; each state inherits the outputs of its failure state
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+    def find(self, text):
+        """Set of values whose keyword occurs in text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set(self._always)
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
 
-    return results
+
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
+
+@functools.lru_cache(maxsize=None)
+def _domain_matcher():
+    """Compiled on first use (not at import): each (domain, keyword position) counts once when its keyword occurs"""
+    return KeywordMatcher(
+        (kw, (domain, i)) for domain, keywords in DOMAIN_KEYWORDS.items() for i, kw in enumerate(keywords)
+    )
 
 
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
-
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
+    scores = dict.fromkeys(DOMAIN_KEYWORDS, 0)
+    for domain, _ in _domain_matcher().find(query.lower()):
+        scores[domain] += 1
     best = max(scores, key=scores.get)
     return best if scores[best] > 0 else "style"
 
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
-    if domain is None:
-        domain = detect_domain(query)
+def search(query, domain=None, max_results=MAX_RESULTS, mode="bm25"):
+    """
+    Main search function with auto-domain detection.
+    mode: "bm25" (keywords), "vector" (hashed embeddings, tolerant of rephrasing)
+    or "hybrid" (both rankings fused)
+    """
+    with profiled("search", query=query, domain=domain, max_results=max_results, mode=mode):
+        if mode not in SEARCH_MODES:
+            return {"error": f"Unknown mode: {mode}. Available: {', '.join(SEARCH_MODES)}"}
+        if domain is None:
+            domain = detect_domain(query)
 
-    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
-    filepath = DATA_DIR / config["file"]
+        config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+        filepath = DATA_DIR / config["file"]
 
-    if not filepath.exists():
-        return {"error": f"File not found: {filepath}", "domain": domain}
+        if not filepath.exists():
+            return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+        key = ("search", domain, normalize_query(query), max_results, mode, data_version(config["file"]))
+        results = list(RESULTS.cached(key, lambda: _search_csv(filepath, config["search_cols"], config["output_cols"],
+                                                              query, max_results, mode)))
 
-    return {
-        "domain": domain,
-        "query": query,
-        "file": config["file"],
-        "count": len(results),
-        "results": results
-    }
+        result = {
+            "domain": domain,
+            "query": query,
+            "file": config["file"],
+            "count": len(results),
+            "results": results
+        }
+        if mode != "bm25":
+            result["mode"] = mode
+        return result
 
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
-    """Search stack-specific guidelines"""
-    if stack not in STACK_CONFIG:
-        return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+def search_all(query, domains=None, stacks=None, max_results=MAX_RESULTS):
+    """Search every domain and stack in one pass, optionally restricted to some of them"""
+    with profiled("search_all", query=query, domains=domains, stacks=stacks, max_results=max_results):
+        unknown = [d for d in domains or [] if d not in CSV_CONFIG]
+        unknown += [st for st in stacks or [] if st not in STACK_CONFIG]
+        if unknown:
+            return {"error": f"Unknown domain/stack: {', '.join(unknown)}"}
 
-    filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+        with profile_stage("load"):
+            unified = get_unified_index()
+        results = unified.search(query, max_results, domains, stacks)
 
-    if not filepath.exists():
-        return {"error": f"Stack file not found: {filepath}", "stack": stack}
+        return {
+            "domain": "all",
+            "query": query,
+            "file": "*",
+            "domains": domains,
+            "stacks": stacks,
+            "count": len(results),
+            "results": results
+        }
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
 
-    return {
-        "domain": "stack",
-        "stack": stack,
-        "query": query,
-        "file": STACK_CONFIG[stack]["file"],
-        "count": len(results),
-        "results": results
-    }
+def validate_request(request):
+    """
+    Check the shape of a run_query() request. Returns an error message, or None
+    when the request is a dict with a non-empty string "query", a positive int
+    "max_results" (if given) and string/list-of-string filters
+    """
+    if not isinstance(request, dict):
+        return "Request must be a JSON object"
+    query = request.get("query")
+    if not isinstance(query, str) or not query.strip():
+        return "'query' must be a non-empty string"
+    max_results = request.get("max_results")
+    if max_results is not None and (isinstance(max_results, bool) or not isinstance(max_results, int)
+                                    or max_results < 1):
+        return "'max_results' must be a positive integer"
+    for field in ("domain", "stack", "mode"):
+        if request.get(field) is not None and not isinstance(request[field], str):
+            return f"'{field}' must be a string"
+    for field in ("domains", "stacks"):
+        value = request.get(field)
+        if value is not None and (not isinstance(value, list) or not all(isinstance(v, str) for v in value)):
+            return f"'{field}' must be a list of strings"
+    return None
+
+
+def run_query(request):
+    """
+    Answer one request dict - {"query", "domain", "stack", "max_results", "mode", "all",
+    "domains", "stacks"} - with search(), search_stack() or search_all().
+    Malformed requests get {"error": ...} (see validate_request)
+    """
+    error = validate_request(request)
+    if error:
+        return {"error": error}
+
+    query = request["query"]
+    max_results = request.get("max_results") or MAX_RESULTS
+    mode = request.get("mode") or "bm25"
+    if request.get("all"):
+        if mode != "bm25":
+            return {"error": f"Mode '{mode}' is not supported when searching all domains and stacks"}
+        return search_all(query, request.get("domains"), request.get("stacks"), max_results)
+    if request.get("stack"):
+        return search_stack(query, request["stack"], max_results, mode)
+    return search(query, request.get("domain"), max_results, mode)
+
+
+def search_stack(query, stack, max_results=MAX_RESULTS, mode="bm25"):
+    """Search stack-specific guidelines (mode as in search())"""
+    with profiled("search_stack", query=query, stack=stack, max_results=max_results, mode=mode):
+        if mode not in SEARCH_MODES:
+            return {"error": f"Unknown mode: {mode}. Available: {', '.join(SEARCH_MODES)}"}
+        if stack not in STACK_CONFIG:
+            return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+
+        filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+
+        if not filepath.exists():
+            return {"error": f"Stack file not found: {filepath}", "stack": stack}
+
+        key = ("stack", stack, normalize_query(query), max_results, mode, data_version(STACK_CONFIG[stack]["file"]))
+        results = list(RESULTS.cached(key, lambda: _search_csv(filepath, _STACK_COLS["search_cols"],
+                                                              _STACK_COLS["output_cols"], query, max_results, mode)))
+
+        result = {
+            "domain": "stack",
+            "stack": stack,
+            "query": query,
+            "file": STACK_CONFIG[stack]["file"],
+            "count": len(results),
+            "results": results
+        }
+        if mode != "bm25":
+            result["mode"] = mode
+        return result
@@ -13,12 +13,15 @@ Usage:
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
 """
 
-import csv
+import contextvars
+import hashlib
 import json
 import os
+import re
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+from core import (search, CSV_CONFIG, DATA_DIR, KeywordMatcher, RESULTS, data_version, normalize_query, profile_stage,
+                  profiled, read_rows)
 
 
 # ============ CONFIGURATION ============
@@ -32,56 +35,152 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+# Search fan-out: worker count and pool type ("thread" or "process"). None sizes the pool
+# to the CPU count, capped at the number of searches; one worker runs inline (no pool or
+# concurrent.futures import), which is what a single-CPU host gets
+DEFAULT_WORKERS = None
+DEFAULT_EXECUTOR = "thread"
+
+# Bulk mode starts a pool of BULK_WORKERS on its own once a manifest has this many unique tasks
+BULK_WORKERS = 4
+BULK_POOL_MIN_TASKS = 16
+
+
+# ============ SEARCH FAN-OUT ============
+class _Done:
+    """Result of a call run inline, with the Future.result() interface."""
+
+    def __init__(self, fn, *args):
+        self._value, self._error = None, None
+        try:
+            self._value = fn(*args)
+        except Exception as e:
+            self._error = e
+
+    def result(self):
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+def _make_pool(max_workers: int, executor: str, tasks: int):
+    """
+    Create the fan-out pool for `tasks` calls, or None to run them inline (one worker).
+    max_workers None uses one worker per CPU; the pool never exceeds `tasks`.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, tasks)
+    if max_workers <= 1:
+        return None
+    # Imported here: concurrent.futures (and logging, threading, multiprocessing) only cost startup when a pool is used
+    if executor == "process":
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=max_workers)
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def _submit(pool, fn, *args):
+    """Submit to the pool, or run inline and return an already-completed result."""
+    if pool is None:
+        return _Done(fn, *args)
+    from concurrent.futures import ThreadPoolExecutor
+    if isinstance(pool, ThreadPoolExecutor):
+        # Run in the caller's context so searches add to the caller's active profile
+        return pool.submit(contextvars.copy_context().run, fn, *args)
+    return pool.submit(fn, *args)
+
+
+def run_searches(requests: dict, max_workers: int = DEFAULT_WORKERS, executor: str = DEFAULT_EXECUTOR) -> dict:
+    """
+    Run independent searches concurrently.
+
+    Args:
+        requests: {name: (query, domain, max_results)}
+        max_workers: Pool size; 1 runs the searches sequentially, None uses one worker per CPU
+        executor: "thread" or "process"
+
+    Returns:
+        {name: search result dict}
+    """
+    pool = _make_pool(max_workers, executor, len(requests))
+    try:
+        futures = {name: _submit(pool, search, *args) for name, args in requests.items()}
+        return {name: future.result() for name, future in futures.items()}
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
 
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
     """Generates design system recommendations from aggregated searches."""
 
-    def __init__(self):
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, executor: str = DEFAULT_EXECUTOR):
         self.reasoning_data = self._load_reasoning()
+        self._build_rule_index()
+        self.max_workers = max_workers
+        self.executor = executor
+        self.prefetched = {}
 
     def _load_reasoning(self) -> list:
         """Load reasoning rules from CSV."""
         filepath = DATA_DIR / REASONING_FILE
         if not filepath.exists():
             return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
+        return read_rows(filepath)
+
+    @staticmethod
+    def _domain_query(query: str, domain: str, style_priority: list = None) -> str:
+        """Query for one domain; style also searches with the priority keywords."""
+        if domain == "style" and style_priority:
+            return f"{query} {' '.join(style_priority[:2])}"
+        return query
 
     def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
-        for domain, config in SEARCH_CONFIG.items():
-            if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
-            else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
+        """Execute searches across multiple domains concurrently."""
+        requests = {
+            domain: (self._domain_query(query, domain, style_priority), domain, config["max_results"])
+            for domain, config in SEARCH_CONFIG.items()
+        }
+        return run_searches(requests, self.max_workers, self.executor)
+
+    def _build_rule_index(self):
+        """Exact-match table plus one automaton over every rule's category and keywords."""
+        self._rule_categories = [rule.get("UI_Category", "").lower() for rule in self.reasoning_data]
+        self._exact_rules = {}
+        patterns = []
+        for i, ui_cat in enumerate(self._rule_categories):
+            self._exact_rules.setdefault(ui_cat, i)
+            patterns.append((ui_cat, ("category", i)))
+            patterns.extend((kw, ("keyword", i)) for kw in ui_cat.replace("/", " ").replace("-", " ").split())
+        self._rule_matcher = KeywordMatcher(patterns)
 
     def _find_reasoning_rule(self, category: str) -> dict:
-        """Find matching reasoning rule for a category."""
+        """Find matching reasoning rule for a category (first rule wins at each level)."""
         category_lower = category.lower()
 
         # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
+        exact = self._exact_rules.get(category_lower)
+        if exact is not None:
+            return self.reasoning_data[exact]
+
+        # One pass over the category finds every rule whose UI category or keyword occurs in it
+        hits = self._rule_matcher.find(category_lower)
+        contained = min((i for kind, i in hits if kind == "category"), default=len(self.reasoning_data))
 
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
+        # Try partial match: UI category inside the category (automaton), or the reverse
+        for i in range(contained):
+            if category_lower in self._rule_categories[i]:
+                return self.reasoning_data[i]
+        if contained < len(self.reasoning_data):
+            return self.reasoning_data[contained]
 
         # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
+        keyword = min((i for kind, i in hits if kind == "keyword"), default=None)
+        if keyword is not None:
+            return self.reasoning_data[keyword]
 
         return {}
 
@@ -160,22 +259,47 @@ class DesignSystemGenerator:
         """Extract results list from search result dict."""
         return search_result.get("results", [])
 
-    def generate(self, query: str, project_name: str = None) -> dict:
-        """Generate complete design system recommendation."""
-        # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
-        product_results = product_result.get("results", [])
-        category = "General"
-        if product_results:
-            category = product_results[0].get("Product Type", "General")
-
-        # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
-        style_priority = reasoning.get("style_priority", [])
-
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+    def generate(self, query: str, project_name: str = None, prefetch: dict = None) -> dict:
+        """
+        Generate complete design system recommendation.
+
+        Searches run as a small dependency graph: color, landing and typography
+        (and any `prefetch` searches, {name: (query, domain, max_results)}) start
+        immediately; product -> reasoning -> style is the only dependent chain.
+        Prefetched results are left in self.prefetched.
+        """
+        # Every search but product (run here, it gates reasoning) goes to the pool
+        pool = _make_pool(self.max_workers, self.executor, len(SEARCH_CONFIG) - 1 + len(prefetch or {}))
+        try:
+            futures = {
+                domain: _submit(pool, search, query, domain, config["max_results"])
+                for domain, config in SEARCH_CONFIG.items()
+                if domain not in ("product", "style")
+            }
+            prefetch_futures = {name: _submit(pool, search, *args) for name, args in (prefetch or {}).items()}
+
+            # Step 1: First search product to get category
+            product_result = search(query, "product", SEARCH_CONFIG["product"]["max_results"])
+            product_results = product_result.get("results", [])
+            category = "General"
+            if product_results:
+                category = product_results[0].get("Product Type", "General")
+
+            # Step 2: Get reasoning rules for this category
+            with profile_stage("reasoning"):
+                reasoning = self._apply_reasoning(category, {})
+            style_priority = reasoning.get("style_priority", [])
+
+            # Step 3: Style search with priority hints, then join the in-flight domains
+            futures["style"] = _submit(pool, search, self._domain_query(query, "style", style_priority),
+                                       "style", SEARCH_CONFIG["style"]["max_results"])
+            with profile_stage("join"):
+                search_results = {domain: future.result() for domain, future in futures.items()}
+                self.prefetched = {name: future.result() for name, future in prefetch_futures.items()}
+            search_results["product"] = product_result  # Reuse product search
+        finally:
+            if pool is not None:
+                pool.shutdown()
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -183,7 +307,8 @@ class DesignSystemGenerator:
         typography_results = self._extract_results(search_results.get("typography", {}))
         landing_results = self._extract_results(search_results.get("landing", {}))
 
-        best_style = self._select_best_match(style_results, reasoning.get("style_priority", []))
+        with profile_stage("select"):
+            best_style = self._select_best_match(style_results, reasoning.get("style_priority", []))
         best_color = color_results[0] if color_results else {}
         best_typography = typography_results[0] if typography_results else {}
         best_landing = landing_results[0] if landing_results else {}
@@ -459,11 +584,23 @@ def format_markdown(design_system: dict) -> str:
 
 
 # ============ MAIN ENTRY POINT ============
+def _design_system_key(query: str) -> tuple:
+    """Result-cache key: normalized query + data version of every file generation reads."""
+    version = data_version(REASONING_FILE, *(CSV_CONFIG[domain]["file"] for domain in SEARCH_CONFIG))
+    return ("design_system", normalize_query(query), version)
+
+
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
-                           persist: bool = False, page: str = None, output_dir: str = None) -> str:
+                           persist: bool = False, page: str = None, output_dir: str = None,
+                           max_workers: int = DEFAULT_WORKERS, executor: str = DEFAULT_EXECUTOR) -> str:
     """
     Main entry point for design system generation.
 
+    The generated design system is cached per normalized query and data version
+    (core.RESULTS), so repeated calls skip the searches and reasoning entirely.
+    With a core.add_profile_hook() callback registered, each call reports its
+    stage timings and the score breakdown of every search it ran.
+
     Args:
         query: Search query (e.g., "SaaS dashboard", "e-commerce luxury")
         project_name: Optional project name for output header
@@ -471,24 +608,41 @@ def generate_design_system(query: str, project_name: str = None, output_format:
         persist: If True, save design system to design-system/ folder
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
+        max_workers: Search fan-out pool size (1 = sequential, None = one worker per CPU)
+        executor: "thread" (default) or "process" pool for the fan-out
 
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
-    
-    # Persist to files if requested
-    if persist:
-        persist_design_system(design_system, page, output_dir, query)
+    with profiled("design_system", query=query, output_format=output_format, persist=persist, page=page,
+                  max_workers=max_workers, executor=executor):
+        key = _design_system_key(query)
+        design_system = RESULTS.get(key)
+        page_search_results = None
+        if design_system is None:
+            generator = DesignSystemGenerator(max_workers, executor)
+            # Page override searches only depend on the page + query, so they overlap with generation
+            page_searches = _page_override_searches(page, query) if persist and page else None
+            design_system = generator.generate(query, project_name, prefetch=page_searches)
+            page_search_results = generator.prefetched or None
+            RESULTS.put(key, design_system)
+        else:
+            design_system = {**design_system, "project_name": project_name or query.upper()}
+
+        # Persist to files if requested
+        if persist:
+            with profile_stage("persist"):
+                persist_design_system(design_system, page, output_dir, query, page_search_results=page_search_results)
 
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+        with profile_stage("format"):
+            if output_format == "markdown":
+                return format_markdown(design_system)
+            return format_ascii_box(design_system)
 
 
 # ============ PERSISTENCE FUNCTIONS ============
-def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
+def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None,
+                          page_search_results: dict = None) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
     
@@ -497,6 +651,7 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
         page_query: Optional query string for intelligent page override generation
+        page_search_results: Optional prefetched page override searches (see _page_override_searches)
     
     Returns:
         dict with created file paths and status
@@ -527,7 +682,7 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     # If page is specified, create page override file with intelligent content
     if page:
         page_file = pages_dir / f"{page.lower().replace(' ', '-')}.md"
-        page_content = format_page_override_md(design_system, page, page_query)
+        page_content = format_page_override_md(design_system, page, page_query, page_search_results)
         with open(page_file, 'w', encoding='utf-8') as f:
             f.write(page_content)
         created_files.append(str(page_file))
@@ -802,14 +957,15 @@ def format_master_md(design_system: dict) -> str:
     return "\n".join(lines)
 
 
-def format_page_override_md(design_system: dict, page_name: str, page_query: str = None) -> str:
+def format_page_override_md(design_system: dict, page_name: str, page_query: str = None,
+                            search_results: dict = None) -> str:
     """Format a page-specific override file with intelligent AI-generated content."""
     project = design_system.get("project_name", "PROJECT")
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     page_title = page_name.replace("-", " ").replace("_", " ").title()
     
     # Detect page type and generate intelligent overrides
-    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system)
+    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system, search_results)
     
     lines = []
     
@@ -911,23 +1067,38 @@ def format_page_override_md(design_system: dict, page_name: str, page_query: str
     return "\n".join(lines)
 
 
-def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict) -> dict:
+def _page_context(page_name: str, page_query: str = None) -> str:
+    """Combined lowercase context used for page override searches."""
+    return f"{page_name.lower()} {(page_query or '').lower()}"
+
+
+def _page_override_searches(page_name: str, page_query: str = None) -> dict:
+    """Search requests ({name: (query, domain, max_results)}) behind a page override file."""
+    combined_context = _page_context(page_name, page_query)
+    return {
+        "style": (combined_context, "style", 1),
+        "ux": (combined_context, "ux", 3),
+        "landing": (combined_context, "landing", 1)
+    }
+
+
+def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict,
+                                    search_results: dict = None) -> dict:
     """
     Generate intelligent overrides based on page type using layered search.
     
     Uses the existing search infrastructure to find relevant style, UX, and layout
-    data instead of hardcoded page types.
+    data instead of hardcoded page types. The three searches run concurrently
+    unless already prefetched via `search_results`.
     """
-    from core import search
-    
-    page_lower = page_name.lower()
-    query_lower = (page_query or "").lower()
-    combined_context = f"{page_lower} {query_lower}"
+    combined_context = _page_context(page_name, page_query)
     
     # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
+    if search_results is None:
+        search_results = run_searches(_page_override_searches(page_name, page_query))
+    style_search = search_results["style"]
+    ux_search = search_results["ux"]
+    landing_search = search_results["landing"]
     
     # Extract results from search response
     style_results = style_search.get("results", [])
@@ -1052,16 +1223,162 @@ def _detect_page_type(context: str, style_results: list) -> str:
     return "General"
 
 
+# ============ BULK GENERATION ============
+_GENERATED_LINE = re.compile(r"^(?:> )?\*\*Generated:\*\* .*$", re.MULTILINE)
+_worker_generator = None
+
+
+def _generate_for_query(query: str) -> dict:
+    """Pool task: the design system for one unique query (one generator per worker)."""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = DesignSystemGenerator(max_workers=1)
+    return RESULTS.cached(_design_system_key(query), lambda: _worker_generator.generate(query))
+
+
+def load_manifest(path: str) -> list:
+    """
+    Read a bulk manifest (JSON) into normalized project entries.
+
+    Accepts {"projects": [...]} or a bare list. Each project is
+    {"name": ..., "query": ..., "pages": [...]}, where a page is a name or
+    {"name": ..., "query": ...}; a page without a query uses the project's.
+
+    Returns:
+        [{"name", "query", "pages": [{"name", "query"}]}]
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    entries = manifest.get("projects", []) if isinstance(manifest, dict) else manifest
+
+    projects = []
+    for i, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict) or not entry.get("query"):
+            raise ValueError(f"Manifest project {i}: expected an object with a 'query'")
+        pages = []
+        for page in entry.get("pages", []):
+            if isinstance(page, str):
+                page = {"name": page}
+            if not page.get("name"):
+                raise ValueError(f"Manifest project {i}: every page needs a 'name'")
+            pages.append({"name": page["name"], "query": page.get("query") or entry["query"]})
+        projects.append({"name": entry.get("name") or entry["query"].upper(), "query": entry["query"], "pages": pages})
+    return projects
+
+
+def _content_key(content: str) -> str:
+    """Hash of rendered markdown, ignoring the 'Generated:' timestamp line."""
+    return hashlib.sha256(_GENERATED_LINE.sub("", content).encode("utf-8")).hexdigest()
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """Write content unless the file already holds the same rendering. Returns True if written."""
+    try:
+        if _content_key(path.read_text(encoding='utf-8')) == _content_key(content):
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def generate_bulk(projects: list, output_dir: str = None, max_workers: int = None,
+                  executor: str = "process") -> dict:
+    """
+    Generate and persist many design systems and page overrides in one pass.
+
+    Design systems are generated once per unique normalized query and page
+    override searches once per unique (query, domain, max_results), all in one
+    worker pool. Every MASTER.md and page file is then rendered and written,
+    skipping files whose content (timestamp aside) is unchanged.
+
+    Args:
+        projects: Entries as returned by load_manifest
+        output_dir: Output directory (defaults to current working directory)
+        max_workers: Pool size; 1 runs everything sequentially. None (default) uses
+            BULK_WORKERS once there are BULK_POOL_MIN_TASKS unique tasks, else runs inline
+        executor: "process" (default) or "thread"
+
+    Returns:
+        dict with written and unchanged file paths and dedup counts
+    """
+    base_dir = Path(output_dir) if output_dir else Path.cwd()
+
+    queries = {}    # normalized query -> query
+    searches = {}   # (normalized query, domain, max_results) -> (query, domain, max_results)
+    for project in projects:
+        queries.setdefault(normalize_query(project["query"]), project["query"])
+        for page in project["pages"]:
+            for query, domain, max_results in _page_override_searches(page["name"], page["query"]).values():
+                searches.setdefault((normalize_query(query), domain, max_results), (query, domain, max_results))
+
+    tasks = len(queries) + len(searches)
+    if max_workers is None:
+        max_workers = BULK_WORKERS if tasks >= BULK_POOL_MIN_TASKS else 1
+    pool = _make_pool(max_workers, executor, tasks)
+    try:
+        ds_futures = {key: _submit(pool, _generate_for_query, query) for key, query in queries.items()}
+        search_futures = {key: _submit(pool, search, *args) for key, args in searches.items()}
+        design_systems = {key: future.result() for key, future in ds_futures.items()}
+        search_results = {key: future.result() for key, future in search_futures.items()}
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    written, unchanged = [], []
+    for project in projects:
+        design_system = {**design_systems[normalize_query(project["query"])], "project_name": project["name"]}
+        design_system_dir = base_dir / "design-system" / project["name"].lower().replace(' ', '-')
+
+        files = [(design_system_dir / "MASTER.md", format_master_md(design_system))]
+        for page in project["pages"]:
+            page_searches = {
+                name: search_results[(normalize_query(query), domain, max_results)]
+                for name, (query, domain, max_results) in _page_override_searches(page["name"], page["query"]).items()
+            }
+            page_file = design_system_dir / "pages" / f"{page['name'].lower().replace(' ', '-')}.md"
+            files.append((page_file, format_page_override_md(design_system, page["name"], page["query"], page_searches)))
+
+        for path, content in files:
+            (written if _write_if_changed(path, content) else unchanged).append(str(path))
+
+    return {
+        "status": "success",
+        "projects": len(projects),
+        "design_systems": len(queries),
+        "searches": len(searches),
+        "written": written,
+        "unchanged": unchanged
+    }
+
+
 # ============ CLI SUPPORT ============
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Generate Design System")
-    parser.add_argument("query", help="Search query (e.g., 'SaaS dashboard')")
+    parser.add_argument("query", nargs="?", help="Search query (e.g., 'SaaS dashboard')")
+    parser.add_argument("--manifest", "-m", type=str, default=None, help="Bulk mode: JSON manifest of projects/pages")
+    parser.add_argument("--output-dir", "-o", type=str, default=None, help="Bulk mode output directory (default: cwd)")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name")
     parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Search fan-out workers (default: one per CPU, 1 = sequential; "
+                             f"with --manifest, {BULK_WORKERS} once it has {BULK_POOL_MIN_TASKS}+ unique tasks)")
+    parser.add_argument("--executor", choices=["thread", "process"], default=None,
+                        help="Fan-out pool type (default: thread, or process with --manifest)")
 
     args = parser.parse_args()
 
-    result = generate_design_system(args.query, args.project_name, args.format)
+    if args.manifest:
+        summary = generate_bulk(load_manifest(args.manifest), args.output_dir, args.workers, args.executor or "process")
+        print(json.dumps(summary, indent=2))
+        raise SystemExit(0)
+    if args.query is None:
+        parser.error("the following arguments are required: query")
+
+    result = generate_design_system(args.query, args.project_name, args.format,
+                                    max_workers=args.workers, executor=args.executor or DEFAULT_EXECUTOR)
     print(result)
@@ -3,8 +3,11 @@
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+       python search.py "<query>" --all [--domains color,ux] [--stacks react,vue]
+       python search.py --batch [queries.jsonl]   (stdin when no file; NDJSON out)
        python search.py "<query>" --design-system [-p "Project Name"]
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
+       python search.py --manifest design-systems.json [-o <output_dir>]
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
 Stacks: html-tailwind, react, nextjs
@@ -12,11 +15,35 @@ Stacks: html-tailwind, react, nextjs
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
   --page       Also create a page-specific override file in design-system/pages/
+  --manifest   Bulk mode: persist every project/page listed in a JSON manifest in one pass
+               ({"projects": [{"name": ..., "query": ..., "pages": ["dashboard", {"name": ..., "query": ...}]}]})
+
+Warm daemon (indexes stay resident between calls):
+  --serve      Run the search daemon on localhost (see server.py)
+  --client     Query the daemon if running, otherwise search in-process
+
+Fast start:
+  --build-bundle  Pack all parsed CSVs and indexes into index/_bundle.idx (rerun after editing data/)
+
+Search modes (--mode):
+  bm25     Keyword ranking (default)
+  vector   Hashed-embedding nearest neighbours; tolerant of rephrased or inflected queries
+  hybrid   Both rankings fused
+
+Result cache (search and design-system results, keyed by normalized query + data version):
+  --cache-dir    Also keep results on disk so they survive across runs (or set $UIPRO_CACHE_DIR)
+  --cache-stats  Print cache hit/miss statistics to stderr on exit
+
+Profiling:
+  --profile      Print per-stage timings and per-result BM25 score breakdowns as JSON to stderr on exit
 """
 
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system
+import sys
+from core import (CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, RESULTS, SEARCH_MODES, add_profile_hook, build_bundle,
+                  json_default, run_query, search, search_all, search_stack)
+# design_system, server and json are imported only by the subcommands and outputs that use them
+# (keeps one-off searches fast)
 
 
 def format_output(result):
@@ -45,13 +72,64 @@ def format_output(result):
     return "\n".join(output)
 
 
+def run_batch(lines, out):
+    """
+    Answer JSON-lines requests against one loaded index set, streaming NDJSON.
+
+    Each line is {"query": ..., "domain"/"stack"/"all"/"domains"/"stacks", "max_results", "id"},
+    a JSON string, or a bare query string. "id" is echoed back so callers can match results.
+    A malformed line gets an {"error": ...} line; it never stops the batch.
+    Returns the number of requests answered.
+    """
+    import json
+    answered = 0
+    for line_num, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line) if line.startswith(("{", "[", '"')) else line
+            if isinstance(request, str):
+                request = {"query": request}
+            result = run_query(request)
+            if "error" in result:
+                result = {**result, "error": f"Line {line_num}: {result['error']}"}
+            if isinstance(request, dict) and "id" in request:
+                result = {"id": request["id"], **result}
+        except Exception as e:
+            result = {"error": f"Line {line_num}: {e}"}
+        out.write(json.dumps(result, ensure_ascii=False, default=json_default) + "\n")
+        out.flush()
+        answered += 1
+    return answered
+
+
+def print_result(result, as_json=False):
+    """Print a search result as indented JSON or as format_output() text"""
+    if as_json:
+        import json
+        print(json.dumps(result, indent=2, ensure_ascii=False, default=json_default))
+    else:
+        print(format_output(result))
+
+
+def _split(value):
+    """Comma-separated CLI list -> list, or None when not given"""
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--mode", choices=SEARCH_MODES, default="bm25", help="Ranking: bm25 (default), vector or hybrid")
+    # Unified cross-domain search
+    parser.add_argument("--all", "-a", action="store_true", help="Search every domain and stack in one pass")
+    parser.add_argument("--domains", type=str, default=None, help="With --all: comma-separated domains to include")
+    parser.add_argument("--stacks", type=str, default=None, help="With --all: comma-separated stacks to include")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
@@ -60,18 +138,81 @@ if __name__ == "__main__":
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
     parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    parser.add_argument("--manifest", "-m", type=str, default=None, help="Bulk design systems from a JSON manifest of projects/pages")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Design system search fan-out workers (default: one per CPU, 1 = sequential; with --manifest, "
+                             "a pool once the manifest is large)")
+    parser.add_argument("--executor", choices=["thread", "process"], default=None,
+                        help="Design system fan-out pool type (default: thread, or process with --manifest)")
+    # Warm daemon
+    parser.add_argument("--serve", action="store_true", help="Run the resident search daemon on localhost")
+    parser.add_argument("--client", action="store_true", help="Use the search daemon if running (falls back to in-process search)")
+    parser.add_argument("--port", type=int, default=None, help="Daemon port (default: 8765 or $UIPRO_SEARCH_PORT)")
+    # Batch mode
+    parser.add_argument("--batch", nargs="?", const="-", default=None, metavar="FILE",
+                        help="Answer JSON-lines queries from FILE (or stdin) and stream NDJSON results")
+    # Fast start
+    parser.add_argument("--build-bundle", action="store_true", help="Pack all parsed CSVs and indexes into one file for fast start")
+    # Result cache
+    parser.add_argument("--cache-dir", type=str, default=None, help="On-disk result cache directory (default: $UIPRO_CACHE_DIR)")
+    parser.add_argument("--cache-stats", action="store_true", help="Print result cache statistics to stderr on exit")
+    parser.add_argument("--profile", action="store_true", help="Print stage timings and score explanations to stderr on exit")
 
     args = parser.parse_args()
 
+    if args.cache_dir:
+        RESULTS.configure(disk_dir=args.cache_dir)
+    if args.cache_stats or args.profile:
+        import atexit
+        import json
+    if args.cache_stats:
+        atexit.register(lambda: print(json.dumps({"cache": RESULTS.stats()}), file=sys.stderr))
+    if args.profile:
+        reports = []
+        add_profile_hook(reports.append)
+        atexit.register(lambda: print(json.dumps({"profile": reports}, ensure_ascii=False, default=json_default),
+                                      file=sys.stderr))
+
+    if args.build_bundle:
+        print(f"Data bundle written to {build_bundle()}")
+        raise SystemExit(0)
+    if args.serve:
+        from server import serve, DEFAULT_PORT
+        serve(port=args.port or DEFAULT_PORT)
+        raise SystemExit(0)
+    if args.batch:
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout)
+        else:
+            with open(args.batch, 'r', encoding='utf-8') as f:
+                run_batch(f, sys.stdout)
+        raise SystemExit(0)
+    if args.manifest:
+        from design_system import generate_bulk, load_manifest
+        summary = generate_bulk(load_manifest(args.manifest), args.output_dir, args.workers, args.executor or "process")
+        print(f"✅ {summary['projects']} projects: {len(summary['written'])} files written, "
+              f"{len(summary['unchanged'])} unchanged "
+              f"({summary['design_systems']} design systems, {summary['searches']} page searches)")
+        for path in summary["written"]:
+            print(f"   📄 {path}")
+        raise SystemExit(0)
+    if args.query is None:
+        parser.error("the following arguments are required: query")
+    if args.all and args.mode != "bm25":
+        parser.error("--mode vector/hybrid is not supported with --all")
+
     # Design system takes priority
     if args.design_system:
+        from design_system import generate_design_system
         result = generate_design_system(
             args.query, 
             args.project_name, 
             args.format,
             persist=args.persist,
             page=args.page,
-            output_dir=args.output_dir
+            output_dir=args.output_dir,
+            max_workers=args.workers,
+            executor=args.executor or "thread"
         )
         print(result)
         
@@ -88,19 +229,21 @@ if __name__ == "__main__":
             print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
             print(f"   If exists, its rules override MASTER.md. Otherwise, use MASTER.md.")
             print("=" * 60)
+    # Daemon-backed search (domain, stack or all)
+    elif args.client:
+        from server import client_search, DEFAULT_PORT
+        result = client_search(args.query, args.domain, args.stack, args.max_results, port=args.port or DEFAULT_PORT,
+                               mode=args.mode, all_sources=args.all, domains=_split(args.domains), stacks=_split(args.stacks))
+        print_result(result, args.json)
+    # Unified search across all domains and stacks
+    elif args.all:
+        result = search_all(args.query, _split(args.domains), _split(args.stacks), args.max_results)
+        print_result(result, args.json)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        result = search_stack(args.query, args.stack, args.max_results, args.mode)
+        print_result(result, args.json)
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        result = search(args.query, args.domain, args.max_results, args.mode)
+        print_result(result, args.json)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Search Daemon - keeps every domain/stack index resident and
+answers searches as JSON over localhost HTTP.
+
+Usage:
+    python search.py --serve [--port 8765]                  # start the daemon
+    python search.py "<query>" --client [--domain <domain>] # ask the daemon, fall back to in-process
+
+Protocol:
+    POST /search  {"query": "...", "domain": "color", "stack": null, "max_results": 3, "mode": "bm25"}
+                  -> same dict as core.search() / core.search_stack()
+                  {"query": "...", "all": true, "domains": [...], "stacks": [...]}
+                  -> same dict as core.search_all()
+    GET  /health  -> {"status": "ok", "indexes": <count>, "cache": <result cache stats>}
+    Malformed requests get 400 {"error": ...}; unexpected failures get 500 {"error": ...}
+"""
+
+import http.client
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core import (INDEXES, MAX_RESULTS, POLL_INTERVAL, RESULTS, get_unified_index, json_default, run_query,
+                  validate_request, warm_indexes)
+
+# ============ CONFIGURATION ============
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get("UIPRO_SEARCH_PORT", "8765"))
+CLIENT_TIMEOUT = 0.5  # seconds; a missing daemon must not slow the CLI down
+
+
+# ============ REQUEST HANDLING ============
+def handle_request(payload):
+    """Dispatch one JSON search request (see core.run_query)"""
+    return run_query(payload)
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    """JSON-over-HTTP front end for the resident indexes"""
+
+    indexes = 0
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False, default=json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "indexes": self.indexes, "cache": RESULTS.stats()})
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/search":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+        error = validate_request(payload)
+        if error:
+            self._send_json(400, {"error": error})
+            return
+        try:
+            result = handle_request(payload)
+        except Exception as e:
+            self._send_json(500, {"error": f"Internal error: {type(e).__name__}: {e}"})
+            return
+        self._send_json(200, result)
+
+    def log_message(self, format, *args):
+        pass  # Keep the daemon quiet; agents read stdout of the client, not the server
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, poll_interval=POLL_INTERVAL):
+    """
+    Load all indexes once and answer requests concurrently until interrupted.
+    Edited CSVs are picked up by the index watcher and swapped in without downtime.
+    """
+    SearchHandler.indexes = warm_indexes()
+    get_unified_index()
+    INDEXES.start(poll_interval)
+    httpd = ThreadingHTTPServer((host, port), SearchHandler)
+    print(f"UI Pro Max search daemon on http://{host}:{port} ({SearchHandler.indexes} indexes resident)", flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        INDEXES.stop()
+
+
+# ============ CLIENT ============
+def query_daemon(payload, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=CLIENT_TIMEOUT):
+    """Send one request to a running daemon. Returns the result dict, or None if unreachable"""
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        conn.request("POST", "/search", body=json.dumps(payload).encode("utf-8"),
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return json.loads(response.read())
+    except (OSError, http.client.HTTPException, json.JSONDecodeError):
+        return None
+    finally:
+        conn.close()
+
+
+def client_search(query, domain=None, stack=None, max_results=MAX_RESULTS, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                  mode="bm25", all_sources=False, domains=None, stacks=None):
+    """Search through the daemon when it is running, otherwise in-process"""
+    payload = {"query": query, "domain": domain, "stack": stack, "max_results": max_results, "mode": mode}
+    if all_sources:
+        payload.update({"all": True, "domains": domains, "stacks": stacks})
+    result = query_daemon(payload, host, port)
+    if result is None:
+        result = handle_request(payload)
+    return result
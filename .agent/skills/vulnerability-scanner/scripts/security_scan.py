@@ -3,8 +3,10 @@
 Skill: vulnerability-scanner
 Script: security_scan.py
 Purpose: Validate that security principles from SKILL.md are applied correctly
-Usage: python security_scan.py <project_path> [--scan-type all|deps|secrets|patterns|config]
+Usage: python security_scan.py <project_path> [--scan-type all|deps|secrets|patterns|config] [--jobs N] [--no-cache]
+       [--since <ref> | --staged | --history]
 Output: JSON with validation findings
+Self-test: python -m doctest security_scan.py
 
 This script verifies:
 1. Dependencies - Supply chain security (OWASP A03)
@@ -18,8 +20,13 @@ import os
 import sys
 import re
 import argparse
+import bisect
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from datetime import datetime
 
 # Fix Windows console encoding for Unicode output
@@ -88,6 +95,46 @@ DANGEROUS_PATTERNS = [
 SKIP_DIRS = {'node_modules', '.git', 'dist', 'build', '__pycache__', '.venv', 'venv', '.next'}
 CODE_EXTENSIONS = {'.js', '.ts', '.jsx', '.tsx', '.py', '.go', '.java', '.rb', '.php'}
 CONFIG_EXTENSIONS = {'.json', '.yaml', '.yml', '.toml', '.env', '.env.local', '.env.development'}
+CONFIG_FILES = {'next.config.js', 'webpack.config.js', '.eslintrc.js'}
+DEFAULT_JOBS = os.cpu_count() or 1
+PARALLEL_MIN_FILES = 64  # below this, process start-up costs more than it saves
+WINDOWS_MAX_WORKERS = 61  # ProcessPoolExecutor limit on Windows (WaitForMultipleObjects)
+CACHE_VERSION = 2
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "security-scan"
+RACY_WINDOW_NS = 2_000_000_000  # files modified this close to the last cache write are re-hashed
+
+CONFIG_PATTERNS = [
+    (r'"DEBUG"\s*:\s*true', "Debug mode enabled", "high"),
+    (r'debug\s*=\s*True', "Debug mode enabled", "high"),
+    (r'NODE_ENV.*development', "Development mode in config", "medium"),
+    (r'"CORS_ALLOW_ALL".*true', "CORS allow all origins", "high"),
+    (r'"Access-Control-Allow-Origin".*\*', "CORS wildcard", "high"),
+    (r'allowCredentials.*true.*origin.*\*', "Dangerous CORS combo", "critical"),
+]
+
+# Anchor literals, one tuple per pattern in the lists above: every match of the
+# pattern contains at least one of them (case-insensitively), so text without
+# any of a pattern's anchors is never handed to that pattern's regex.
+SECRET_ANCHORS = [
+    ("api",), ("token",), ("bearer",),
+    ("akia",), ("aws",), ("azure",), ("google",),
+    ("password",), ("://",),
+    ("begin",), ("ssh-rsa",),
+    ("eyj",),
+]
+
+DANGEROUS_ANCHORS = [
+    ("eval",), ("exec",), ("function",), ("child_process",), ("subprocess",),
+    ("dangerouslysetinnerhtml",), ("innerhtml",), ("document",),
+    ("select", "insert", "update", "delete"), ("select", "insert", "update", "delete"),
+    ("verify",), ("--insecure",), ("disable",),
+    ("pickle",), ("yaml",),
+]
+
+CONFIG_ANCHORS = [
+    ("debug",), ("debug",), ("node_env",), ("cors_allow_all",), ("access-control-allow-origin",),
+    ("allowcredentials",),
+]
 
 
 # ============================================================================
@@ -178,199 +225,773 @@ def scan_dependencies(project_path: str) -> Dict[str, Any]:
     return results
 
 
-def scan_secrets(project_path: str) -> Dict[str, Any]:
+# ============================================================================
+#  PATTERN MATCHING
+# ============================================================================
+
+class PatternSet:
+    """
+    A pattern list compiled once: every regex on its own, all of them as one
+    alternation of named groups (p0, p1, ...), and their anchor literals.
+
+    combined.search(text) finds a match exactly when some pattern matches
+    text, so one call rejects a line that matches nothing; the individual
+    regexes then run only on lines that matched, keeping per-pattern results
+    identical to running every pattern. On whole files the anchors do that
+    job instead: a single alternation cannot use the literal-prefix search
+    the individual regexes get, and is slower than running the few patterns
+    whose anchors occur.
+    """
+
+    def __init__(self, patterns: List[Tuple], anchors: List[Tuple[str, ...]]):
+        if len(patterns) != len(anchors):
+            raise ValueError("Need one anchor tuple per pattern")
+        self.patterns = patterns
+        self.regexes = [re.compile(p[0], re.IGNORECASE) for p in patterns]
+        self.combined = re.compile(
+            "|".join(f"(?P<p{i}>{p[0]})" for i, p in enumerate(patterns)), re.IGNORECASE
+        )
+        self.anchors = [tuple(a.lower() for a in group) for group in anchors]
+        self.anchor_regexes = [
+            re.compile("|".join(re.escape(a) for a in group), re.IGNORECASE) for group in anchors
+        ]
+
+    def fingerprint(self) -> str:
+        """Hash of the patterns and anchors; cached findings are only valid for the same set."""
+        data = json.dumps([self.patterns, self.anchors], sort_keys=True)
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def active(self, text: str) -> List[int]:
+        """
+        Indexes of the patterns whose anchors occur in text, ignoring case
+        exactly as the regexes do.
+
+        ASCII text is lowercased and searched with plain `in`. Other text is
+        searched with the anchors compiled as IGNORECASE regexes, because re
+        also equates some non-ASCII letters with ASCII ones that lower() and
+        casefold() leave alone, such as the dotless '\u0131' with 'i':
+
+        >>> [DANGEROUS.patterns[i][1] for i in DANGEROUS.active("data = p\u0131ckle.load(f)")]
+        ['pickle usage']
+        """
+        if text.isascii():
+            lowered = text.lower()
+            return [i for i, group in enumerate(self.anchors) if any(a in lowered for a in group)]
+        return [i for i, regex in enumerate(self.anchor_regexes) if regex.search(text)]
+
+    def anchor_lines(self, text: str, active: List[int]) -> List[int]:
+        """Sorted 0-based numbers of the lines containing an anchor of an active pattern."""
+        newlines = [m.start() for m in re.finditer("\n", text)]
+        lines = set()
+        if not text.isascii():
+            for i in active:
+                for m in self.anchor_regexes[i].finditer(text):
+                    lines.add(bisect.bisect_left(newlines, m.start()))
+            return sorted(lines)
+        lowered = text.lower()
+        for anchor in {a for i in active for a in self.anchors[i]}:
+            pos = lowered.find(anchor)
+            while pos != -1:
+                lines.add(bisect.bisect_left(newlines, pos))
+                pos = lowered.find(anchor, pos + 1)
+        return sorted(lines)
+
+
+SECRETS = PatternSet(SECRET_PATTERNS, SECRET_ANCHORS)
+DANGEROUS = PatternSet(DANGEROUS_PATTERNS, DANGEROUS_ANCHORS)
+CONFIG = PatternSet(CONFIG_PATTERNS, CONFIG_ANCHORS)
+
+
+# ============================================================================
+#  FILE SCANNERS
+# ============================================================================
+
+class FileScanner:
+    """
+    Base class for scanners that inspect file contents.
+    The project is walked and each file read once; the content is handed to
+    every registered scanner that wants it (see scan_files).
+    """
+    tool = "file_scanner"
+    patterns = None  # PatternSet used by scan_file, if any
+
+    def wants(self, filename: str, ext: str) -> bool:
+        """Return True if this scanner inspects files with this name/extension."""
+        return False
+
+    def fingerprint(self) -> str:
+        """Identify what scan_file does; cached findings from another fingerprint are rescanned."""
+        name = type(self).__qualname__
+        return f"{name}:{self.patterns.fingerprint()}" if self.patterns else name
+
+    def new_results(self) -> Dict[str, Any]:
+        """Fresh result dict for one scan."""
+        return {"tool": self.tool, "findings": [], "status": ""}
+
+    def scan_file(self, rel_path: str, content: str) -> List[Dict[str, Any]]:
+        """Return the findings for one file."""
+        return []
+
+    def add(self, results: Dict[str, Any], findings: List[Dict[str, Any]]) -> None:
+        """Merge the findings of one file into the results."""
+        results["findings"].extend(findings)
+
+    def finish(self, results: Dict[str, Any], project_path: str) -> Dict[str, Any]:
+        """
+        Set the status once every file has been scanned. project_path is None
+        when only some files were scanned (git modes); skip project-wide checks then.
+        """
+        return results
+
+
+class SecretScanner(FileScanner):
     """
     Validate no hardcoded secrets (OWASP A04).
     Checks: API keys, tokens, passwords, cloud credentials.
     """
-    results = {
-        "tool": "secret_scanner",
-        "findings": [],
-        "status": "[OK] No secrets detected",
-        "scanned_files": 0,
-        "by_severity": {"critical": 0, "high": 0, "medium": 0}
-    }
-    
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-        
-        for file in files:
-            ext = Path(file).suffix.lower()
-            if ext not in CODE_EXTENSIONS and ext not in CONFIG_EXTENSIONS:
-                continue
-                
-            filepath = Path(root) / file
-            results["scanned_files"] += 1
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                    for pattern, secret_type, severity in SECRET_PATTERNS:
-                        matches = re.findall(pattern, content, re.IGNORECASE)
-                        if matches:
-                            results["findings"].append({
-                                "file": str(filepath.relative_to(project_path)),
-                                "type": secret_type,
-                                "severity": severity,
-                                "count": len(matches)
-                            })
-                            results["by_severity"][severity] += len(matches)
-                            
-            except Exception:
-                pass
-    
-    if results["by_severity"]["critical"] > 0:
-        results["status"] = "[!!] CRITICAL: Secrets exposed!"
-    elif results["by_severity"]["high"] > 0:
-        results["status"] = "[!] HIGH: Secrets found"
-    elif sum(results["by_severity"].values()) > 0:
-        results["status"] = "[?] Potential secrets detected"
-    
-    # Limit findings for output
-    results["findings"] = results["findings"][:15]
-    
-    return results
+    tool = "secret_scanner"
+    patterns = SECRETS
 
+    def wants(self, filename: str, ext: str) -> bool:
+        return ext in CODE_EXTENSIONS or ext in CONFIG_EXTENSIONS
 
-def scan_code_patterns(project_path: str) -> Dict[str, Any]:
+    def new_results(self) -> Dict[str, Any]:
+        return {
+            "tool": self.tool,
+            "findings": [],
+            "status": "[OK] No secrets detected",
+            "scanned_files": 0,
+            "by_severity": {"critical": 0, "high": 0, "medium": 0}
+        }
+
+    def scan_file(self, rel_path: str, content: str) -> List[Dict[str, Any]]:
+        findings = []
+        for i in self.patterns.active(content):
+            _, secret_type, severity = self.patterns.patterns[i]
+            matches = self.patterns.regexes[i].findall(content)
+            if matches:
+                findings.append({
+                    "file": rel_path,
+                    "type": secret_type,
+                    "severity": severity,
+                    "count": len(matches)
+                })
+        return findings
+
+    def add(self, results: Dict[str, Any], findings: List[Dict[str, Any]]) -> None:
+        results["findings"].extend(findings)
+        for finding in findings:
+            results["by_severity"][finding["severity"]] += finding["count"]
+
+    def finish(self, results: Dict[str, Any], project_path: str) -> Dict[str, Any]:
+        if results["by_severity"]["critical"] > 0:
+            results["status"] = "[!!] CRITICAL: Secrets exposed!"
+        elif results["by_severity"]["high"] > 0:
+            results["status"] = "[!] HIGH: Secrets found"
+        elif sum(results["by_severity"].values()) > 0:
+            results["status"] = "[?] Potential secrets detected"
+
+        # Limit findings for output
+        results["findings"] = results["findings"][:15]
+        return results
+
+
+class PatternScanner(FileScanner):
     """
     Validate dangerous code patterns (OWASP A05).
     Checks: Injection risks, XSS, unsafe deserialization.
     """
-    results = {
-        "tool": "pattern_scanner",
-        "findings": [],
-        "status": "[OK] No dangerous patterns",
-        "scanned_files": 0,
-        "by_category": {}
-    }
-    
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-        
-        for file in files:
-            ext = Path(file).suffix.lower()
-            if ext not in CODE_EXTENSIONS:
+    tool = "pattern_scanner"
+    patterns = DANGEROUS
+
+    def wants(self, filename: str, ext: str) -> bool:
+        return ext in CODE_EXTENSIONS
+
+    def new_results(self) -> Dict[str, Any]:
+        return {
+            "tool": self.tool,
+            "findings": [],
+            "status": "[OK] No dangerous patterns",
+            "scanned_files": 0,
+            "by_category": {}
+        }
+
+    def scan_file(self, rel_path: str, content: str) -> List[Dict[str, Any]]:
+        active = self.patterns.active(content)
+        if not active:
+            return []
+
+        # Patterns are matched per line; only lines holding an anchor can match
+        lines = content.split("\n")
+        findings = []
+        for index in self.patterns.anchor_lines(content, active):
+            line = lines[index]
+            if not self.patterns.combined.search(line):
                 continue
-                
-            filepath = Path(root) / file
-            results["scanned_files"] += 1
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = f.readlines()
-                    
-                    for line_num, line in enumerate(lines, 1):
-                        for pattern, name, severity, category in DANGEROUS_PATTERNS:
-                            if re.search(pattern, line, re.IGNORECASE):
-                                results["findings"].append({
-                                    "file": str(filepath.relative_to(project_path)),
-                                    "line": line_num,
-                                    "pattern": name,
-                                    "severity": severity,
-                                    "category": category,
-                                    "snippet": line.strip()[:80]
-                                })
-                                results["by_category"][category] = results["by_category"].get(category, 0) + 1
-                                
-            except Exception:
-                pass
-    
-    critical_count = sum(1 for f in results["findings"] if f["severity"] == "critical")
-    high_count = sum(1 for f in results["findings"] if f["severity"] == "high")
-    
-    if critical_count > 0:
-        results["status"] = f"[!!] CRITICAL: {critical_count} dangerous patterns"
-    elif high_count > 0:
-        results["status"] = f"[!] HIGH: {high_count} risky patterns"
-    elif results["findings"]:
-        results["status"] = "[?] Some patterns need review"
-    
-    # Limit findings
-    results["findings"] = results["findings"][:20]
-    
-    return results
+            for i in active:
+                if self.patterns.regexes[i].search(line):
+                    _, name, severity, category = self.patterns.patterns[i]
+                    findings.append({
+                        "file": rel_path,
+                        "line": index + 1,
+                        "pattern": name,
+                        "severity": severity,
+                        "category": category,
+                        "snippet": line.strip()[:80]
+                    })
+        return findings
 
+    def add(self, results: Dict[str, Any], findings: List[Dict[str, Any]]) -> None:
+        results["findings"].extend(findings)
+        for finding in findings:
+            category = finding["category"]
+            results["by_category"][category] = results["by_category"].get(category, 0) + 1
 
-def scan_configuration(project_path: str) -> Dict[str, Any]:
+    def finish(self, results: Dict[str, Any], project_path: str) -> Dict[str, Any]:
+        critical_count = sum(1 for f in results["findings"] if f["severity"] == "critical")
+        high_count = sum(1 for f in results["findings"] if f["severity"] == "high")
+
+        if critical_count > 0:
+            results["status"] = f"[!!] CRITICAL: {critical_count} dangerous patterns"
+        elif high_count > 0:
+            results["status"] = f"[!] HIGH: {high_count} risky patterns"
+        elif results["findings"]:
+            results["status"] = "[?] Some patterns need review"
+
+        # Limit findings
+        results["findings"] = results["findings"][:20]
+        return results
+
+
+class ConfigScanner(FileScanner):
     """
     Validate security configuration (OWASP A02).
     Checks: Security headers, CORS, debug modes.
     """
-    results = {
-        "tool": "config_scanner",
-        "findings": [],
-        "status": "[OK] Configuration secure",
-        "checks": {}
-    }
-    
-    # Check common config files for issues
-    config_issues = [
-        (r'"DEBUG"\s*:\s*true', "Debug mode enabled", "high"),
-        (r'debug\s*=\s*True', "Debug mode enabled", "high"),
-        (r'NODE_ENV.*development', "Development mode in config", "medium"),
-        (r'"CORS_ALLOW_ALL".*true', "CORS allow all origins", "high"),
-        (r'"Access-Control-Allow-Origin".*\*', "CORS wildcard", "high"),
-        (r'allowCredentials.*true.*origin.*\*', "Dangerous CORS combo", "critical"),
-    ]
-    
+    tool = "config_scanner"
+    patterns = CONFIG
+
+    def wants(self, filename: str, ext: str) -> bool:
+        return ext in CONFIG_EXTENSIONS or filename in CONFIG_FILES
+
+    def new_results(self) -> Dict[str, Any]:
+        return {
+            "tool": self.tool,
+            "findings": [],
+            "status": "[OK] Configuration secure",
+            "checks": {}
+        }
+
+    def scan_file(self, rel_path: str, content: str) -> List[Dict[str, Any]]:
+        findings = []
+        for i in self.patterns.active(content):
+            if self.patterns.regexes[i].search(content):
+                _, issue, severity = self.patterns.patterns[i]
+                findings.append({
+                    "file": rel_path,
+                    "issue": issue,
+                    "severity": severity
+                })
+        return findings
+
+    def finish(self, results: Dict[str, Any], project_path: str) -> Dict[str, Any]:
+        # Check for security header configurations (whole-project scans only)
+        if project_path is not None:
+            header_files = ["next.config.js", "next.config.mjs", "middleware.ts", "nginx.conf"]
+            for hf in header_files:
+                hf_path = Path(project_path) / hf
+                if hf_path.exists():
+                    results["checks"]["security_headers_config"] = True
+                    break
+            else:
+                results["checks"]["security_headers_config"] = False
+                results["findings"].append({
+                    "issue": "No security headers configuration found",
+                    "severity": "medium",
+                    "recommendation": "Configure CSP, HSTS, X-Frame-Options headers"
+                })
+
+        if any(f["severity"] == "critical" for f in results["findings"]):
+            results["status"] = "[!!] CRITICAL: Configuration issues"
+        elif any(f["severity"] == "high" for f in results["findings"]):
+            results["status"] = "[!] HIGH: Configuration review needed"
+        elif results["findings"]:
+            results["status"] = "[?] Minor configuration issues"
+
+        return results
+
+
+# Registered file scanners, in report order: scan type -> (report name, scanner)
+FILE_SCANNERS: Dict[str, Tuple[str, FileScanner]] = {}
+
+
+def register_scanner(key: str, name: str, scanner: FileScanner) -> None:
+    """
+    Register a file scanner under a --scan-type key.
+
+    Args:
+        key: Value accepted by --scan-type
+        name: Key of the scanner's results in the report's "scans" dict
+        scanner: FileScanner instance
+    """
+    FILE_SCANNERS[key] = (name, scanner)
+
+
+register_scanner("secrets", "secrets", SecretScanner())
+register_scanner("patterns", "code_patterns", PatternScanner())
+register_scanner("config", "configuration", ConfigScanner())
+
+
+# ============================================================================
+#  TRAVERSAL
+# ============================================================================
+
+def iter_project_files(project_path: str, paths: List[str] = None):
+    """
+    Walk the project once, yielding (filepath, filename, ext) outside SKIP_DIRS.
+    If paths (relative to the project) are given, only those files are visited.
+    """
+    if paths is not None:
+        for rel_path in sorted(paths):
+            filepath = Path(project_path) / rel_path
+            if SKIP_DIRS.isdisjoint(Path(rel_path).parts[:-1]) and filepath.is_file():
+                yield filepath, filepath.name, filepath.suffix.lower()
+        return
+
     for root, dirs, files in os.walk(project_path):
         dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-        
+
         for file in files:
-            ext = Path(file).suffix.lower()
-            if ext not in CONFIG_EXTENSIONS and file not in ['next.config.js', 'webpack.config.js', '.eslintrc.js']:
-                continue
-                
-            filepath = Path(root) / file
-            
+            yield Path(root) / file, file, Path(file).suffix.lower()
+
+
+def read_file(filepath: Path) -> str:
+    """Read a file as text, or return None if it cannot be read."""
+    data = read_bytes(filepath)
+    return None if data is None else decode_text(data)
+
+
+def read_bytes(filepath: Path) -> bytes:
+    """Read a file's raw bytes, or return None if it cannot be read."""
+    try:
+        with open(filepath, 'rb') as f:
+            return f.read()
+    except Exception:
+        return None
+
+
+def decode_text(data: bytes) -> str:
+    """Decode file bytes the way text-mode open() with errors='ignore' would."""
+    return data.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def scan_file(filepath: str, rel_path: str, keys: List[str],
+              known_digest: str = None) -> Tuple[str, Dict[str, List[Dict[str, Any]]]]:
+    """
+    Read one file and run the given scanners over its content.
+
+    Args:
+        filepath: Path to read
+        rel_path: Path reported in findings
+        keys: FILE_SCANNERS keys that want this file
+        known_digest: Content hash of a cached scan; an unchanged file is not rescanned
+
+    Returns:
+        (content hash, findings keyed by scan type). The findings are None when
+        the hash equals known_digest; both are None if the file cannot be read.
+    """
+    data = read_bytes(filepath)
+    if data is None:
+        return None, None
+    digest = hashlib.sha1(data).hexdigest()
+    if digest == known_digest:
+        return digest, None
+    content = decode_text(data)
+    return digest, {key: FILE_SCANNERS[key][1].scan_file(rel_path, content) for key in keys}
+
+
+def _scan_task(task: Tuple[str, str, List[str], str]) -> Tuple[str, Dict[str, List[Dict[str, Any]]]]:
+    """Process-pool entry point for scan_file."""
+    return scan_file(*task)
+
+
+def map_tasks(tasks: List[Tuple[str, str, List[str], str]],
+              jobs: int) -> List[Tuple[str, Dict[str, List[Dict[str, Any]]]]]:
+    """
+    Return scan_file results in task order, spread over `jobs` processes.
+    Small scans and single-job runs stay in-process; so does a host that
+    cannot start a process pool.
+    """
+    if sys.platform == "win32":
+        jobs = min(jobs, WINDOWS_MAX_WORKERS)
+    if jobs > 1 and len(tasks) >= PARALLEL_MIN_FILES:
+        try:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                chunksize = max(1, len(tasks) // (jobs * 4))
+                return list(pool.map(_scan_task, tasks, chunksize=chunksize))
+        except (OSError, ValueError, BrokenProcessPool):
+            pass
+    return [_scan_task(task) for task in tasks]
+
+
+# ============================================================================
+#  INCREMENTAL CACHE
+# ============================================================================
+
+class ScanCache:
+    """
+    Per-file findings from earlier scans of one project, stored as JSON.
+
+    An entry is reused without reading the file when its size and mtime are
+    unchanged, and after reading when its content hash is unchanged. Findings
+    are kept per scanner and dropped when the scanner's fingerprint (its
+    pattern set) changes.
+    """
+
+    def __init__(self, path: Path, fingerprints: Dict[str, str]):
+        self.path = path
+        self.fingerprints = fingerprints
+        self.written_ns = 0
+        self.files = {}
+        self.seen = {}
+        self.hits = 0
+        self.scanned = 0
+
+    @classmethod
+    def for_project(cls, project_path: str, cache_dir: str) -> "ScanCache":
+        """Load the cache file for a project from cache_dir."""
+        key = hashlib.sha1(os.path.abspath(project_path).encode("utf-8")).hexdigest()[:16]
+        fingerprints = {key: scanner.fingerprint() for key, (_, scanner) in FILE_SCANNERS.items()}
+        cache = cls(Path(cache_dir) / f"{key}.json", fingerprints)
+        cache.load()
+        return cache
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        valid = {key for key, fp in data.get("scanners", {}).items() if self.fingerprints.get(key) == fp}
+        self.written_ns = data.get("written_ns", 0)
+        for rel_path, entry in data.get("files", {}).items():
+            entry["findings"] = {k: v for k, v in entry["findings"].items() if k in valid}
+            self.files[rel_path] = entry
+
+    def lookup(self, rel_path: str, st: os.stat_result, keys: List[str]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return (entry, fresh) for a file. `fresh` means the cached findings for
+        every key can be used without reading the file. A file modified within
+        RACY_WINDOW_NS of the last cache write is always re-hashed, since a
+        later edit could leave the same size and mtime.
+        """
+        entry = self.files.get(rel_path)
+        if entry is None or any(key not in entry["findings"] for key in keys):
+            return entry, False
+        fresh = (entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+                 and st.st_mtime_ns < self.written_ns - RACY_WINDOW_NS)
+        return entry, fresh
+
+    def store(self, rel_path: str, st: os.stat_result, digest: str,
+              findings: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Record the findings of a file for the next run."""
+        old = self.files.get(rel_path)
+        if old is not None and old["sha1"] == digest:
+            findings = {**old["findings"], **findings}
+        self.seen[rel_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                               "sha1": digest, "findings": findings}
+
+    def save(self, partial: bool) -> None:
+        """
+        Write the cache atomically. Entries for files not seen in this run are
+        kept only for a partial run (not every scanner selected), where they
+        may belong to a scanner that did not walk them.
+        """
+        files = {**self.files, **self.seen} if partial else self.seen
+        data = {
+            "version": CACHE_VERSION,
+            "written_ns": time.time_ns(),
+            "scanners": self.fingerprints,
+            "files": files,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(data))  # dumps uses the C encoder; dump() does not
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # The cache is an optimization; a read-only home must not fail the scan
+
+
+def scan_files(project_path: str, keys: List[str], jobs: int = 1,
+               cache: ScanCache = None, paths: List[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the selected file scanners over the project in a single traversal.
+    Each file is read at most once and its content is passed to every scanner
+    that wants it. With jobs > 1 files are scanned in a process pool; results
+    are merged in traversal order, so the report matches a serial run.
+
+    Args:
+        project_path: Project directory to scan
+        keys: FILE_SCANNERS keys to run
+        jobs: Number of worker processes
+        cache: ScanCache whose unchanged files are not rescanned (saved afterwards)
+        paths: Only scan these project-relative files instead of walking the tree
+            (project-wide checks such as security headers are skipped then)
+
+    Returns:
+        Scanner results keyed by scan type
+    """
+    scanners = [(key, FILE_SCANNERS[key][1]) for key in keys]
+    results = {key: scanner.new_results() for key, scanner in scanners}
+
+    # One slot per file in traversal order: cached findings, or a pending task
+    slots = []
+    tasks = []
+    for filepath, filename, ext in iter_project_files(project_path, paths):
+        wanted = [key for key, scanner in scanners if scanner.wants(filename, ext)]
+        if not wanted:
+            continue
+
+        for key in wanted:
+            if "scanned_files" in results[key]:
+                results[key]["scanned_files"] += 1
+
+        rel_path = str(filepath.relative_to(project_path))
+        st = entry = None
+        if cache is not None:
             try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                    for pattern, issue, severity in config_issues:
-                        if re.search(pattern, content, re.IGNORECASE):
-                            results["findings"].append({
-                                "file": str(filepath.relative_to(project_path)),
-                                "issue": issue,
-                                "severity": severity
-                            })
-                            
-            except Exception:
+                st = os.stat(filepath)
+            except OSError:
                 pass
-    
-    # Check for security header configurations
-    header_files = ["next.config.js", "next.config.mjs", "middleware.ts", "nginx.conf"]
-    for hf in header_files:
-        hf_path = Path(project_path) / hf
-        if hf_path.exists():
-            results["checks"]["security_headers_config"] = True
-            break
-    else:
-        results["checks"]["security_headers_config"] = False
-        results["findings"].append({
-            "issue": "No security headers configuration found",
-            "severity": "medium",
-            "recommendation": "Configure CSP, HSTS, X-Frame-Options headers"
-        })
-    
-    if any(f["severity"] == "critical" for f in results["findings"]):
-        results["status"] = "[!!] CRITICAL: Configuration issues"
-    elif any(f["severity"] == "high" for f in results["findings"]):
-        results["status"] = "[!] HIGH: Configuration review needed"
-    elif results["findings"]:
-        results["status"] = "[?] Minor configuration issues"
-    
+            else:
+                entry, fresh = cache.lookup(rel_path, st, wanted)
+                if fresh:
+                    cache.store(rel_path, st, entry["sha1"], {})
+                    slots.append({key: entry["findings"][key] for key in wanted})
+                    cache.hits += 1
+                    continue
+
+        known = entry["sha1"] if entry is not None and all(k in entry["findings"] for k in wanted) else None
+        slots.append((rel_path, st, entry, wanted))
+        tasks.append((str(filepath), rel_path, wanted, known))
+
+    done = iter(map_tasks(tasks, jobs))
+    for slot in slots:
+        if isinstance(slot, tuple):
+            rel_path, st, entry, wanted = slot
+            digest, file_findings = next(done)
+            if digest is None:
+                continue
+            if file_findings is None:
+                file_findings = {key: entry["findings"][key] for key in wanted}
+                cache.hits += 1
+            elif cache is not None:
+                cache.scanned += 1
+            if cache is not None and st is not None:
+                cache.store(rel_path, st, digest, file_findings)
+            slot = file_findings
+        for key, findings in slot.items():
+            FILE_SCANNERS[key][1].add(results[key], findings)
+
+    for key, scanner in scanners:
+        scanner.finish(results[key], project_path if paths is None else None)
+
+    if cache is not None:
+        cache.save(partial=paths is not None or set(keys) != set(FILE_SCANNERS))
+
     return results
 
 
+# ============================================================================
+#  GIT SOURCES
+# ============================================================================
+
+def run_git(project_path: str, *args: str) -> bytes:
+    """Run a git command in the project and return its stdout."""
+    try:
+        result = subprocess.run(["git", "-C", project_path, *args], capture_output=True, timeout=120)
+    except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+        raise RuntimeError(f"git {args[0]} failed: {e}")
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"git {args[0]} failed: {message}")
+    return result.stdout
+
+
+def split_paths(output: bytes) -> List[str]:
+    """Split NUL-separated git path output."""
+    return [p.decode("utf-8", errors="surrogateescape") for p in output.split(b"\0") if p]
+
+
+def changed_files(project_path: str, ref: str) -> List[str]:
+    """
+    Project-relative files that differ from `ref` in the working tree,
+    plus untracked files that are not ignored. Deleted files are left out.
+    """
+    changed = run_git(project_path, "diff", "--name-only", "-z", "--relative", "--diff-filter=d", ref, "--")
+    untracked = run_git(project_path, "ls-files", "-z", "--others", "--exclude-standard")
+    return sorted(set(split_paths(changed)) | set(split_paths(untracked)))
+
+
+def staged_blobs(project_path: str) -> List[Tuple[str, str]]:
+    """(blob id, path) of every added or modified file in the index."""
+    staged = set(split_paths(run_git(project_path, "diff", "--cached", "--name-only", "-z",
+                                     "--relative", "--diff-filter=d")))
+    blobs = []
+    for line in split_paths(run_git(project_path, "ls-files", "-s", "-z")):
+        info, path = line.split("\t", 1)
+        mode, sha, stage = info.split()
+        if path in staged and stage == "0" and mode != "160000":
+            blobs.append((sha, path))
+    return blobs
+
+
+def history_blobs(project_path: str) -> List[Tuple[str, str]]:
+    """
+    (blob id, path) of every file version any commit reachable from any ref
+    added or modified under the project directory, each pair once. A blob
+    committed at several paths is listed at each of them, so a scanner that
+    only wants some names or extensions still sees it wherever it appeared.
+    Merges are diffed against every parent to catch conflict resolutions.
+    The log is streamed rather than buffered.
+    """
+    argv = ["git", "-C", project_path, "log", "--all", "-m", "--no-renames", "--relative", "--raw",
+            "--no-abbrev", "-z", "--format=", "--diff-filter=AM"]
+    try:
+        proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError as e:
+        raise RuntimeError(f"git log failed: {e}")
+    seen = set()
+    objects = []
+    meta = None
+    try:
+        for field in _split_stream(proc.stdout, b"\0"):
+            if meta is None:
+                meta = field.strip() if field.strip().startswith(b":") else None  # Skip commit separators
+                continue
+            # ":<old mode> <new mode> <old id> <new id> <status>", then the path
+            _, mode, _, sha, _ = meta.decode("ascii").split()
+            meta = None
+            path = field.decode("utf-8", errors="surrogateescape")
+            if mode != "160000" and (sha, path) not in seen:  # 160000: submodule commit, not a blob
+                seen.add((sha, path))
+                objects.append((sha, path))
+    finally:
+        proc.stdout.close()
+        message = proc.stderr.read().decode("utf-8", errors="replace").strip()
+        proc.stderr.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"git log failed: {message}")
+    return objects
+
+
+def _split_stream(stream, sep: bytes, chunk_size: int = 1 << 16):
+    """Yield the sep-terminated fields of a binary stream as they arrive."""
+    tail = b""
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        fields = (tail + chunk).split(sep)
+        tail = fields.pop()
+        yield from fields
+    if tail:
+        yield tail
+
+
+def iter_blobs(project_path: str, shas: List[str]):
+    """Stream (blob id, bytes) for the given object ids through one `git cat-file --batch`."""
+    proc = subprocess.Popen(["git", "-C", project_path, "cat-file", "--batch"],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        for sha in shas:
+            proc.stdin.write(sha.encode("ascii") + b"\n")
+            proc.stdin.flush()
+            header = proc.stdout.readline().split()
+            if len(header) != 3:
+                continue  # "<sha> missing"
+            data = proc.stdout.read(int(header[2]))
+            proc.stdout.read(1)  # trailing newline
+            if header[1] == b"blob":
+                yield sha, data
+    finally:
+        proc.stdin.close()
+        proc.stdout.close()
+        proc.wait()
+
+
+def scan_blobs(project_path: str, keys: List[str], objects: List[Tuple[str, str]],
+               label_blobs: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the selected file scanners over git objects instead of the working tree.
+
+    Args:
+        project_path: Directory inside the git repository
+        keys: FILE_SCANNERS keys to run
+        objects: (blob id, project-relative path) pairs; each blob is read once
+        label_blobs: Report files as "<path> (blob <id>)", for blobs that may
+            no longer exist in the working tree
+
+    Returns:
+        Scanner results keyed by scan type
+    """
+    scanners = [(key, FILE_SCANNERS[key][1]) for key in keys]
+    results = {key: scanner.new_results() for key, scanner in scanners}
+
+    wanted_by_blob = {}  # blob id -> [(path, scanner keys)], so a blob at several paths is read once
+    for sha, path in objects:
+        filename = path.rsplit("/", 1)[-1]
+        ext = Path(filename).suffix.lower()
+        if not SKIP_DIRS.isdisjoint(path.split("/")[:-1]):
+            continue
+        wanted = [key for key, scanner in scanners if scanner.wants(filename, ext)]
+        if wanted:
+            wanted_by_blob.setdefault(sha, []).append((path, wanted))
+
+    for sha, data in iter_blobs(project_path, list(wanted_by_blob)):
+        content = decode_text(data)
+        for path, wanted in wanted_by_blob[sha]:
+            label = f"{path} (blob {sha[:12]})" if label_blobs else path
+            for key in wanted:
+                if "scanned_files" in results[key]:
+                    results[key]["scanned_files"] += 1
+                FILE_SCANNERS[key][1].add(results[key], FILE_SCANNERS[key][1].scan_file(label, content))
+
+    for key, scanner in scanners:
+        scanner.finish(results[key], None)  # Only some blobs, not the working tree
+
+    return results
+
+
+def scan_secrets(project_path: str) -> Dict[str, Any]:
+    """Validate no hardcoded secrets (OWASP A04)."""
+    return scan_files(project_path, ["secrets"])["secrets"]
+
+
+def scan_code_patterns(project_path: str) -> Dict[str, Any]:
+    """Validate dangerous code patterns (OWASP A05)."""
+    return scan_files(project_path, ["patterns"])["patterns"]
+
+
+def scan_configuration(project_path: str) -> Dict[str, Any]:
+    """Validate security configuration (OWASP A02)."""
+    return scan_files(project_path, ["config"])["config"]
+
+
 # ============================================================================
 #  MAIN
 # ============================================================================
 
-def run_full_scan(project_path: str, scan_type: str = "all") -> Dict[str, Any]:
-    """Execute security validation scans."""
+def run_full_scan(project_path: str, scan_type: str = "all", jobs: int = 1,
+                  cache_dir: str = None, since: str = None, staged: bool = False,
+                  history: bool = False) -> Dict[str, Any]:
+    """
+    Execute security validation scans (reusing per-file results from cache_dir, if given).
+    since/staged/history switch the file scanners to git sources: files changed
+    since a ref, the staged versions of changed files, or every blob in history.
+    These modes skip the dependency scan and the project-wide security headers check.
+    """
     
     report = {
         "project": project_path,
@@ -385,28 +1006,43 @@ def run_full_scan(project_path: str, scan_type: str = "all") -> Dict[str, Any]:
         }
     }
     
-    scanners = {
-        "deps": ("dependencies", scan_dependencies),
-        "secrets": ("secrets", scan_secrets),
-        "patterns": ("code_patterns", scan_code_patterns),
-        "config": ("configuration", scan_configuration),
-    }
-    
-    for key, (name, scanner) in scanners.items():
-        if scan_type == "all" or scan_type == key:
-            result = scanner(project_path)
-            report["scans"][name] = result
-            
-            findings_count = len(result.get("findings", []))
-            report["summary"]["total_findings"] += findings_count
-            
-            for finding in result.get("findings", []):
-                sev = finding.get("severity", "low")
-                if sev == "critical":
-                    report["summary"]["critical"] += 1
-                elif sev == "high":
-                    report["summary"]["high"] += 1
-    
+    file_keys = [key for key in FILE_SCANNERS if scan_type in ("all", key)]
+    git_mode = since is not None or staged or history
+    if git_mode:
+        run_git(project_path, "rev-parse", "--git-dir")  # fail early outside a repository
+    if staged or history:
+        report["source"] = {"mode": "staged" if staged else "history"}
+        objects = staged_blobs(project_path) if staged else history_blobs(project_path)
+        file_results = scan_blobs(project_path, file_keys, objects, label_blobs=history) if file_keys else {}
+    else:
+        paths = None
+        if since is not None:
+            paths = changed_files(project_path, since)
+            report["source"] = {"mode": "since", "ref": since, "changed_files": len(paths)}
+        cache = ScanCache.for_project(project_path, cache_dir) if cache_dir and file_keys else None
+        file_results = scan_files(project_path, file_keys, jobs, cache, paths) if file_keys else {}
+        if cache is not None:
+            report["cache"] = {"path": str(cache.path), "reused": cache.hits, "scanned": cache.scanned}
+
+    results = []
+    if scan_type in ("all", "deps") and not git_mode:
+        results.append(("dependencies", scan_dependencies(project_path)))
+    for key in file_keys:
+        results.append((FILE_SCANNERS[key][0], file_results[key]))
+
+    for name, result in results:
+        report["scans"][name] = result
+
+        findings_count = len(result.get("findings", []))
+        report["summary"]["total_findings"] += findings_count
+
+        for finding in result.get("findings", []):
+            sev = finding.get("severity", "low")
+            if sev == "critical":
+                report["summary"]["critical"] += 1
+            elif sev == "high":
+                report["summary"]["high"] += 1
+
     # Determine overall status
     if report["summary"]["critical"] > 0:
         report["summary"]["overall_status"] = "[!!] CRITICAL ISSUES FOUND"
@@ -423,10 +1059,23 @@ def main():
         description="Validate security principles from vulnerability-scanner skill"
     )
     parser.add_argument("project_path", nargs="?", default=".", help="Project directory to scan")
-    parser.add_argument("--scan-type", choices=["all", "deps", "secrets", "patterns", "config"],
+    parser.add_argument("--scan-type", choices=["all", "deps"] + list(FILE_SCANNERS),
                         default="all", help="Type of scan to run")
     parser.add_argument("--output", choices=["json", "summary"], default="json",
                         help="Output format")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                        help="Worker processes for file scanning (default: CPU count)")
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR),
+                        help="Where per-file results are kept between runs")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Rescan every file and leave the cache untouched")
+    git_modes = parser.add_mutually_exclusive_group()
+    git_modes.add_argument("--since", metavar="REF",
+                           help="Only scan files changed relative to a git ref (plus untracked files)")
+    git_modes.add_argument("--staged", action="store_true",
+                           help="Scan the staged content of files changed in the git index")
+    git_modes.add_argument("--history", action="store_true",
+                           help="Scan every file version committed on any git ref, at each path it was committed at")
     
     args = parser.parse_args()
     
@@ -434,7 +1083,13 @@ def main():
         print(json.dumps({"error": f"Directory not found: {args.project_path}"}))
         sys.exit(1)
     
-    result = run_full_scan(args.project_path, args.scan_type)
+    cache_dir = None if args.no_cache else args.cache_dir
+    try:
+        result = run_full_scan(args.project_path, args.scan_type, max(1, args.jobs), cache_dir,
+                               since=args.since, staged=args.staged, history=args.history)
+    except RuntimeError as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
     
     if args.output == "summary":
         print(f"\n{'='*60}")